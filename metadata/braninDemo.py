@@ -2,18 +2,64 @@
 # Copyright 2022 Ocean Protocol Foundation
 # SPDX-License-Identifier: Apache-2.0
 #
+import hashlib
+import itertools
+import json
+import os
 import pickle
 import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import arff
 import requests
 import matplotlib
 import numpy
 from matplotlib import pyplot
-from sklearn import gaussian_process
+from sklearn import (base, cluster, compose, gaussian_process, kernel_approximation, linear_model, pipeline,
+                     preprocessing)
+from sklearn.gaussian_process import kernels
+
+try:
+    from download_cache import fetch
+except ImportError:
+    fetch = None
 
 matplotlib.use("agg")
 
+# Parsed datasets are kept as .npy files named after the ARFF file's hash
+ARFF_CACHE_DIR = os.environ.get("OCEAN_ARFF_CACHE_DIR",
+                                os.path.join(tempfile.gettempdir(), "ocean-arff-cache"))
+ARFF_BLOCK_ROWS = 65536
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# "pickle" keeps the original single pickled Zhat, "npy" writes memory-mappable arrays
+OUTPUT_FORMATS = ("pickle", "npy", "both")
+GPR_MODES = ("exact", "tuned", "nystroem", "rff", "experts")
+# Feature count for the Nystroem and random-Fourier-feature approximations
+GPR_COMPONENTS = 500
+# RBF width on standardized inputs used by the approximate kernels
+RBF_GAMMA = 0.5
+# Regularization of the linear model fitted on the approximate kernel features
+RIDGE_ALPHA = 1e-3
+# Training points per local expert
+EXPERT_SIZE = 250
+# Largest training set the benchmark fits exactly
+EXACT_MAX_POINTS = 5000
+# Temporary memory all prediction threads together may use
+PREDICT_MEMORY_BUDGET = 256 * 1024 ** 2
+# Random optimizer restarts run in parallel by the "tuned" mode, on top of the default start
+GPR_RESTARTS = 4
+# Fitted "tuned" kernel hyperparameters, one JSON file per dataset hash
+KERNEL_CACHE_DIR = os.environ.get("OCEAN_KERNEL_CACHE_DIR",
+                                  os.path.join(tempfile.gettempdir(), "ocean-kernel-cache"))
+# Rows of the Branin grid evaluated per block by branin_grid
+MESH_CHUNK_ROWS = 256
+# Largest grid mesh_benchmark still evaluates with create_mesh
+MESH_LEGACY_MAX_POINTS = 5000
+
 
 def branin_mesh(X0, X1):
     # b,c,t = 5.1/(4.*(pi)**2), 5./pi, 1./(8.*pi)
@@ -34,8 +80,38 @@ def create_mesh(npoints):
     return X0, X1, Z
 
 
+def branin_grid(npoints, dtype=numpy.float64, out=None, chunk_rows=MESH_CHUNK_ROWS):
+    """Evaluates Branin on the create_mesh grid without building meshgrid arrays.
+
+    Every term that depends only on x0 is computed once on the 1-D axis and
+    broadcast against each block of x1 rows in place, so the only full-size
+    allocation is the result. `out` may be a preallocated array or a memory map
+    from `numpy.lib.format.open_memmap`. Returns the two axes and the grid Z.
+    """
+    b, c, t = 0.12918450914398066, 1.5915494309189535, 0.039788735772973836
+    X0_vec = numpy.linspace(-5.0, 10.0, npoints)
+    X1_vec = numpy.linspace(0.0, 15.0, npoints)
+    # u = x1 + shift(x0) and r(x0) are split so each block is out = (x1 + shift)**2 + r
+    shift = (c * X0_vec - b * X0_vec**2 - 6).astype(dtype)
+    r = (10.0 * (1.0 - t) * numpy.cos(X0_vec) + 10).astype(dtype)
+    x1 = X1_vec.astype(dtype)[:, numpy.newaxis]
+
+    Z = numpy.empty((npoints, npoints), dtype=dtype) if out is None else out
+    for start in range(0, npoints, chunk_rows):
+        block = Z[start:start + chunk_rows]
+        numpy.add(x1[start:start + chunk_rows], shift, out=block)
+        numpy.square(block, out=block)
+        block += r
+    return X0_vec, X1_vec, Z
+
+
 def get_input(dataset_url):
-    response = requests.get(dataset_url, stream=True)  # Stream to handle large files
+    if fetch:
+        filename = fetch(dataset_url)
+        print(f"File available as: {filename}")
+        return filename
+
+    response = requests.get(dataset_url, stream=True, timeout=60)  # Stream to handle large files
     response.raise_for_status()  # Check for errors
 
     # Extract filename from URL
@@ -43,7 +119,7 @@ def get_input(dataset_url):
 
     # Save the file locally
     with open(filename, 'wb') as file:
-        for chunk in response.iter_content(chunk_size=8192):  
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
             file.write(chunk)
 
     print(f"File downloaded as: {filename}")
@@ -51,8 +127,86 @@ def get_input(dataset_url):
     return filename  
 
 
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _arff_data_lines(datafile):
+    for line in datafile:
+        line = line.strip()
+        if line and not line.startswith("%"):
+            yield line
+
+
+def read_numeric_arff(filename):
+    """Parses an all-numeric dense ARFF file straight into a float64 array.
+
+    Raises ValueError for nominal, string or date attributes and for sparse data,
+    which the generic `arff.load` path still handles.
+    """
+    columns = 0
+    with open(filename) as datafile:
+        # readline() rather than iteration so tell() can mark where the data starts
+        for line in iter(datafile.readline, ""):
+            token = line.strip().lower()
+            if token.startswith("@attribute"):
+                if token.split()[-1] not in ("numeric", "real", "integer"):
+                    raise ValueError(f"Non-numeric attribute: {line.strip()}")
+                columns += 1
+            elif token.startswith("@data"):
+                break
+        data_start = datafile.tell()
+        rows = sum(1 for _ in _arff_data_lines(datafile))
+
+        mat = numpy.empty((rows, columns), dtype=numpy.float64)
+        datafile.seek(data_start)
+        lines = _arff_data_lines(datafile)
+        for start in range(0, rows, ARFF_BLOCK_ROWS):
+            block = list(itertools.islice(lines, ARFF_BLOCK_ROWS))
+            if block[0].startswith("{"):
+                raise ValueError("Sparse ARFF data is not supported")
+            values = numpy.fromstring(",".join(block).replace("?", "nan"), sep=",")
+            if values.size != len(block) * columns:
+                raise ValueError(f"Malformed data rows after row {start}")
+            mat[start:start + len(block)] = values.reshape(len(block), columns)
+    return mat
+
+
+def load_dataset(filename, cache_dir=ARFF_CACHE_DIR):
+    """Returns the ARFF data as an array, memory-mapped from a .npy sidecar when one exists.
+
+    Sidecars are named by the SHA-256 of the ARFF file, so an edited dataset is
+    parsed again instead of picking up stale values.
+    """
+    sidecar = os.path.join(cache_dir, file_sha256(filename) + ".npy")
+    if os.path.exists(sidecar):
+        print(f"Loading parsed data from {sidecar}")
+        return numpy.load(sidecar, mmap_mode="r")
+
+    try:
+        mat = read_numeric_arff(filename)
+    except ValueError as e:
+        print(f"Falling back to the generic ARFF parser: {e}")
+        with open(filename) as datafile:
+            mat = numpy.stack(arff.load(datafile)["data"])
+
+    os.makedirs(cache_dir, exist_ok=True)
+    partial = f"{sidecar}.{os.getpid()}.tmp"
+    with open(partial, "wb") as npy_file:
+        numpy.save(npy_file, mat)
+    os.replace(partial, sidecar)
+    return numpy.load(sidecar, mmap_mode="r")
+
+
 def plot(Zhat, npoints):
-    X0, X1, Z = create_mesh(npoints)
+    X0_vec, X1_vec, Z = branin_grid(npoints)
+    # Broadcast views stand in for the meshgrid arrays without allocating them
+    X0 = numpy.broadcast_to(X0_vec, Z.shape)
+    X1 = numpy.broadcast_to(X1_vec[:, numpy.newaxis], Z.shape)
     # plot data + model
     fig, ax = pyplot.subplots(subplot_kw={"projection": "3d"})
     ax.plot_wireframe(X0, X1, Z, linewidth=1)
@@ -61,38 +215,472 @@ def plot(Zhat, npoints):
     pyplot.show()
 
 
-def run_gpr(local=False):
-    npoints = 15
+class LocalExpertsGPR(base.RegressorMixin, base.BaseEstimator):
+    """Exact GPRs fitted on k-means partitions; each query is answered by its nearest expert."""
+
+    def __init__(self, expert_size=EXPERT_SIZE, random_state=0):
+        self.expert_size = expert_size
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        n_experts = max(1, int(numpy.ceil(len(X) / self.expert_size)))
+        self.partition_ = cluster.KMeans(n_clusters=n_experts, n_init=1,
+                                         random_state=self.random_state).fit(X)
+        self.experts_ = [
+            gaussian_process.GaussianProcessRegressor(normalize_y=True)
+            .fit(X[self.partition_.labels_ == k], y[self.partition_.labels_ == k])
+            for k in range(n_experts)
+        ]
+        return self
+
+    def predict(self, X, return_std=False):
+        labels = self.partition_.predict(X)
+        yhat = numpy.empty(len(X))
+        std = numpy.empty(len(X)) if return_std else None
+        for k, expert in enumerate(self.experts_):
+            mask = labels == k
+            if not mask.any():
+                continue
+            if return_std:
+                mean, expert_std = expert.predict(X[mask], return_std=True)
+                std[mask] = numpy.ravel(expert_std)
+            else:
+                mean = expert.predict(X[mask])
+            yhat[mask] = numpy.ravel(mean)
+        return (yhat, std) if return_std else yhat
+
+
+def _restart_fit(kernel, X, y, theta, normalize_y):
+    """Optimizes the kernel hyperparameters from one starting point (runs in a worker process)."""
+    model = gaussian_process.GaussianProcessRegressor(kernel=kernel.clone_with_theta(theta),
+                                                      normalize_y=normalize_y)
+    model.fit(X, y)
+    return model.log_marginal_likelihood_value_, model.kernel_.theta
+
+
+def dataset_key(X, y, kernel, restarts, normalize_y=True):
+    digest = hashlib.sha256()
+    for part in (X, y):
+        digest.update(numpy.ascontiguousarray(part, dtype=numpy.float64).tobytes())
+    digest.update(f"{kernel!r}|{restarts}|{normalize_y}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TunedGPR(base.RegressorMixin, base.BaseEstimator):
+    """Exact GPR with optimizer restarts on a process pool and a hyperparameter cache.
+
+    `kernel` defaults to a learnable ConstantKernel * anisotropic RBF. The first
+    start is the kernel's own theta, the others are drawn log-uniformly within
+    its bounds. The best hyperparameters are stored under KERNEL_CACHE_DIR,
+    keyed by a hash of the data, kernel, restart count and `normalize_y`, so a
+    repeat fit on the same dataset skips optimization entirely. `cache_dir=None`
+    disables the cache.
+    """
+
+    def __init__(self, kernel=None, restarts=GPR_RESTARTS, normalize_y=True, workers=None,
+                 cache_dir=KERNEL_CACHE_DIR, random_state=0):
+        self.kernel = kernel
+        self.restarts = restarts
+        self.normalize_y = normalize_y
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.random_state = random_state
+
+    def _kernel(self):
+        if self.kernel is not None:
+            return base.clone(self.kernel)
+        return (kernels.ConstantKernel(1.0, (1e-3, 1e5))
+                * kernels.RBF(length_scale=[1.0, 1.0], length_scale_bounds=(1e-2, 1e3)))
+
+    def _optimize(self, kernel, X, y):
+        bounds = kernel.bounds
+        rng = numpy.random.default_rng(self.random_state)
+        starts = [kernel.theta] + [rng.uniform(bounds[:, 0], bounds[:, 1]) for _ in range(self.restarts)]
+        if len(starts) == 1:
+            # A single start gains nothing from a worker process
+            return _restart_fit(kernel, X, y, starts[0], self.normalize_y)[1]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(_restart_fit, *zip(*[(kernel, X, y, theta, self.normalize_y)
+                                                         for theta in starts])))
+        return max(results, key=lambda result: result[0])[1]
+
+    def fit(self, X, y):
+        kernel = self._kernel()
+        cache_path = None
+        theta = None
+        if self.cache_dir:
+            key = dataset_key(X, y, kernel, self.restarts, self.normalize_y)
+            cache_path = os.path.join(self.cache_dir, key + ".json")
+            if os.path.exists(cache_path):
+                with open(cache_path) as cache_file:
+                    theta = numpy.array(json.load(cache_file)["theta"])
+                print(f"Reusing kernel hyperparameters from {cache_path}")
+
+        self.cache_hit_ = theta is not None
+        if theta is None:
+            theta = self._optimize(kernel, X, y)
+            if cache_path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(cache_path, "w") as cache_file:
+                    json.dump({"theta": theta.tolist()}, cache_file)
+
+        self.gpr_ = gaussian_process.GaussianProcessRegressor(kernel=kernel.clone_with_theta(theta),
+                                                              normalize_y=self.normalize_y, optimizer=None)
+        self.gpr_.fit(X, y)
+        self.X_train_ = self.gpr_.X_train_
+        return self
+
+    def predict(self, X, return_std=False):
+        return self.gpr_.predict(X, return_std=return_std)
+
+
+def build_model(mode="exact", n_components=GPR_COMPONENTS):
+    """Returns an unfitted regressor for one of GPR_MODES.
+
+    "exact" is the full GaussianProcessRegressor with its default ConstantKernel
+    * RBF (O(n²) memory, O(n³) time). Those hyperparameters are optimized on
+    every fit, so it runs through TunedGPR with no extra restarts to reuse them
+    from the kernel cache. "tuned" adds random restarts, normalize_y and an
+    anisotropic RBF, see TunedGPR.
+    "nystroem" and "rff" approximate the RBF kernel with `n_components` landmark
+    or random Fourier features and fit a ridge regression on top, which is
+    linear in n. "experts" fits exact GPRs on partitions of EXPERT_SIZE points.
+    """
+    if mode == "exact":
+        return TunedGPR(kernel=kernels.ConstantKernel() * kernels.RBF(), restarts=0, normalize_y=False)
+    if mode == "tuned":
+        return TunedGPR()
+    if mode == "nystroem":
+        features = kernel_approximation.Nystroem(gamma=RBF_GAMMA, n_components=n_components,
+                                                 random_state=0)
+    elif mode == "rff":
+        features = kernel_approximation.RBFSampler(gamma=RBF_GAMMA, n_components=n_components,
+                                                   random_state=0)
+    elif mode == "experts":
+        return pipeline.make_pipeline(preprocessing.StandardScaler(), LocalExpertsGPR())
+    else:
+        raise ValueError(f"Unknown GPR mode {mode!r}, expected one of {GPR_MODES}")
+    return compose.TransformedTargetRegressor(
+        regressor=pipeline.make_pipeline(preprocessing.StandardScaler(), features,
+                                         linear_model.Ridge(alpha=RIDGE_ALPHA)),
+        transformer=preprocessing.StandardScaler(),
+    )
+
+
+class MeshQueries:
+    """The create_mesh grid as a sliceable sequence of (x0, x1) rows, built on demand.
+
+    Slicing yields the same points, in the same row-major order, as
+    stacking the ravelled `numpy.meshgrid` arrays, without materializing them.
+    """
+
+    def __init__(self, npoints):
+        self.x0 = numpy.linspace(-5.0, 10.0, npoints)
+        self.x1 = numpy.linspace(0.0, 15.0, npoints)
+
+    def __len__(self):
+        return len(self.x0) * len(self.x1)
+
+    def __getitem__(self, rows):
+        flat = numpy.arange(*rows.indices(len(self)))
+        return numpy.column_stack([self.x0[flat % len(self.x0)], self.x1[flat // len(self.x0)]])
+
+
+def _query_bytes(model, return_std):
+    """Rough bytes of temporaries one query row costs in `model.predict`."""
+    # Exact GPR builds a cross-kernel row against every training point; the
+    # approximations build one row of kernel features
+    width = len(model.X_train_) if hasattr(model, "X_train_") else GPR_COMPONENTS
+    return 8 * width * (3 if return_std else 1)
+
+
+def predict_batched(model, X, return_std=False, memory_budget=PREDICT_MEMORY_BUDGET, workers=None,
+                    out=None, out_std=None):
+    """Predicts `X` in chunks sized to `memory_budget`, spread over a thread pool.
+
+    `X` can be an array or anything sliceable with a length, such as MeshQueries.
+    Results are written into `out` (and `out_std` with `return_std`), which may be
+    preallocated arrays or memory maps from `numpy.lib.format.open_memmap`.
+    `return_std` is supported by the GPR modes, "exact", "tuned" and "experts"
+    (each query takes the std of its expert); the "nystroem" and "rff" ridge
+    models have no predictive std and raise ValueError.
+    """
+    if return_std and isinstance(model, compose.TransformedTargetRegressor):
+        raise ValueError("return_std needs a Gaussian process model, the kernel approximation "
+                         "modes only predict the mean")
+    workers = workers or os.cpu_count() or 1
+    n = len(X)
+    rows = max(1, memory_budget // workers // _query_bytes(model, return_std))
+    out = numpy.empty(n) if out is None else out
+    if return_std and out_std is None:
+        out_std = numpy.empty(n)
+
+    def predict_chunk(start):
+        stop = min(n, start + rows)
+        if return_std:
+            mean, std = model.predict(X[start:stop], return_std=True)
+            out_std[start:stop] = numpy.ravel(std)
+        else:
+            mean = model.predict(X[start:stop])
+        out[start:stop] = numpy.ravel(mean)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # list() re-raises the first exception from a worker
+        list(pool.map(predict_chunk, range(0, n, rows)))
+    return (out, out_std) if return_std else out
+
+
+def gpr_benchmark(sizes=(225, 1000, 4000, 20000), modes=("exact", "nystroem", "rff", "experts"),
+                  npoints=50):
+    """Prints fit/predict time and mesh RMSE of each mode as the training set grows.
+
+    Accuracy is measured on the create_mesh grid, against the true Branin values
+    and against exact GPR wherever exact GPR is still affordable. The exact
+    reference is fitted on standardized inputs with `normalize_y=True`, like the
+    approximations; on raw Branin values its default zero-mean prior collapses.
+    """
+    _, _, Z = branin_grid(npoints)
+    mesh = MeshQueries(npoints)[:]
+    rng = numpy.random.default_rng(0)
+    for n in sizes:
+        X = numpy.column_stack([rng.uniform(-5.0, 10.0, n), rng.uniform(0.0, 15.0, n)])
+        y = branin_mesh(X[:, 0], X[:, 1])
+        exact = None
+        print(f"n = {n}:")
+        for mode in modes:
+            if mode == "exact" and n > EXACT_MAX_POINTS:
+                print(f"  {mode:<9} skipped above {EXACT_MAX_POINTS} points")
+                continue
+            began = time.perf_counter()
+            if mode == "exact":
+                model = pipeline.make_pipeline(preprocessing.StandardScaler(),
+                                               gaussian_process.GaussianProcessRegressor(normalize_y=True))
+            else:
+                model = build_model(mode, min(GPR_COMPONENTS, n))
+            model.fit(X, y)
+            fitted = time.perf_counter()
+            yhat = numpy.ravel(model.predict(mesh))
+            predicted = time.perf_counter()
+            if mode == "exact":
+                exact = yhat
+            line = (f"  {mode:<9} fit {fitted - began:8.3f}s  predict {predicted - fitted:7.3f}s  "
+                    f"RMSE vs Branin {numpy.sqrt(numpy.mean((yhat - Z.ravel()) ** 2)):8.3f}")
+            if exact is not None and mode != "exact":
+                line += f"  vs exact GPR {numpy.sqrt(numpy.mean((yhat - exact) ** 2)):8.3f}"
+            print(line)
+
+
+def kernel_cache_benchmark(npoints=15, restarts=GPR_RESTARTS):
+    """Prints TunedGPR fit time with a cold and with a warm hyperparameter cache."""
+    _, _, Z = branin_grid(npoints)
+    X = MeshQueries(npoints)[:]
+    y = Z.ravel()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for label in ("cold cache", "warm cache"):
+            began = time.perf_counter()
+            model = TunedGPR(restarts=restarts, cache_dir=cache_dir).fit(X, y)
+            print(f"{label}: fit {time.perf_counter() - began:.3f}s "
+                  f"(cache hit: {model.cache_hit_}, kernel: {model.gpr_.kernel_})")
+
+
+def mesh_benchmark(sizes=(1000, 4000, 10000), legacy_max=MESH_LEGACY_MAX_POINTS):
+    """Prints time and peak traced memory of create_mesh against branin_grid.
+
+    The memmap case writes the grid into a temporary `.npy` file through `out`,
+    so its peak covers only the per-block temporaries.
+    """
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        memmap_path = os.path.join(scratch_dir, "zhat.npy")
+        candidates = [
+            ("create_mesh", lambda n: create_mesh(n)),
+            ("branin_grid float64", lambda n: branin_grid(n)),
+            ("branin_grid float32", lambda n: branin_grid(n, dtype=numpy.float32)),
+            ("branin_grid memmap", lambda n: branin_grid(n, out=numpy.lib.format.open_memmap(
+                memmap_path, mode="w+", dtype=numpy.float64, shape=(n, n)))),
+        ]
+        for n in sizes:
+            print(f"npoints = {n}:")
+            for name, evaluate in candidates:
+                if name == "create_mesh" and n > legacy_max:
+                    print(f"  {name:<20} skipped above {legacy_max} points")
+                    continue
+                tracemalloc.start()
+                began = time.perf_counter()
+                result = evaluate(n)
+                seconds = time.perf_counter() - began
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                del result
+                print(f"  {name:<20} {seconds:8.3f}s  peak {peak / 1024 ** 2:10.1f} MiB")
+
+
+def _scaler_arrays(prefix, scaler):
+    return {f"{prefix}_mean": numpy.atleast_1d(scaler.mean_), f"{prefix}_scale": numpy.atleast_1d(scaler.scale_)}
+
+
+def _gpr_arrays(gpr, prefix=""):
+    return {
+        f"{prefix}kernel_theta": gpr.kernel_.theta,
+        f"{prefix}alpha": numpy.asarray(gpr.alpha_),
+        f"{prefix}X_train": numpy.asarray(gpr.X_train_),
+        f"{prefix}y_train_mean": numpy.atleast_1d(gpr._y_train_mean),
+        f"{prefix}y_train_std": numpy.atleast_1d(gpr._y_train_std),
+    }
+
+
+def model_arrays(model):
+    """Returns the fitted parameters of a build_model regressor as plain arrays.
+
+    The arrays hold everything `predict` uses, so the model can be evaluated
+    without unpickling it; `model_prediction` describes how for each mode.
+    Exact GPRs store alpha and the training inputs. The kernel approximations
+    store the input and target scalers, the feature map and the ridge weights.
+    Experts store the input scaler, the k-means centroids and every expert's
+    GPR, concatenated with `expert_offsets` marking where each one starts.
+    """
+    model = getattr(model, "gpr_", model)
+    if isinstance(model, gaussian_process.GaussianProcessRegressor):
+        return _gpr_arrays(model)
+    if isinstance(model, compose.TransformedTargetRegressor):
+        x_scaler, features, ridge = model.regressor_
+        arrays = {**_scaler_arrays("x_scaler", x_scaler), **_scaler_arrays("y_scaler", model.transformer_),
+                  "gamma": numpy.atleast_1d(features.gamma)}
+        if isinstance(features, kernel_approximation.Nystroem):
+            arrays.update(components=features.components_, normalization=features.normalization_)
+        else:
+            arrays.update(random_weights=features.random_weights_, random_offset=features.random_offset_)
+        arrays.update(coef=ridge.coef_, intercept=numpy.atleast_1d(ridge.intercept_))
+        return arrays
+    x_scaler, experts = model
+    gprs = [_gpr_arrays(expert) for expert in experts.experts_]
+    sizes = [len(gpr["X_train"]) for gpr in gprs]
+    return {
+        **_scaler_arrays("x_scaler", x_scaler),
+        "centroids": experts.partition_.cluster_centers_,
+        "expert_offsets": numpy.concatenate([[0], numpy.cumsum(sizes)]),
+        "expert_kernel_thetas": numpy.stack([gpr["kernel_theta"] for gpr in gprs]),
+        "expert_alpha": numpy.concatenate([numpy.ravel(gpr["alpha"]) for gpr in gprs]),
+        "expert_X_train": numpy.concatenate([gpr["X_train"] for gpr in gprs]),
+        "expert_y_train_mean": numpy.concatenate([gpr["y_train_mean"] for gpr in gprs]),
+        "expert_y_train_std": numpy.concatenate([gpr["y_train_std"] for gpr in gprs]),
+    }
+
+
+def model_prediction(model):
+    """Describes, for the manifest, how the model_arrays of `model` give a prediction."""
+    model = getattr(model, "gpr_", model)
+    if isinstance(model, gaussian_process.GaussianProcessRegressor):
+        return "k(x, X_train) @ alpha * y_train_std + y_train_mean, k from `kernel` with kernel_theta"
+    if isinstance(model, compose.TransformedTargetRegressor):
+        if isinstance(model.regressor_[1], kernel_approximation.Nystroem):
+            features = "exp(-gamma * |z - components|^2) @ normalization.T"
+        else:
+            features = "cos(z @ random_weights + random_offset) * sqrt(2 / len(random_offset))"
+        return (f"z = (x - x_scaler_mean) / x_scaler_scale; f = {features}; "
+                f"(f @ coef + intercept) * y_scaler_scale + y_scaler_mean")
+    return ("z = (x - x_scaler_mean) / x_scaler_scale; expert k is the nearest centroid to z and "
+            "predicts like an exact GPR on rows expert_offsets[k]:expert_offsets[k + 1] of expert_alpha "
+            "and expert_X_train, with expert_kernel_thetas[k] in `kernel`, expert_y_train_mean[k] and "
+            "expert_y_train_std[k]")
+
+
+def _describe(path, array):
+    return {"path": os.path.basename(path), "shape": list(array.shape), "dtype": str(array.dtype)}
+
+
+def write_result_artifacts(prefix, Zhat, npoints, model, mode):
+    """Writes the mesh axes, model parameters and a JSON manifest next to `{prefix}_zhat.npy`.
+
+    Only plain arrays are stored, so consumers can `numpy.load(mmap_mode="r")`
+    the prediction grid without copying it and without unpickling anything.
+    """
+    zhat_path = f"{prefix}_zhat.npy"
+    if not isinstance(Zhat, numpy.memmap):
+        numpy.save(zhat_path, Zhat)
+    queries = MeshQueries(npoints)
+    mesh_path = f"{prefix}_mesh.npz"
+    numpy.savez(mesh_path, x0=queries.x0, x1=queries.x1)
+    params = model_arrays(model)
+    params_path = f"{prefix}_model.npz"
+    numpy.savez(params_path, **params)
+
+    gpr = getattr(model, "gpr_", model)
+    if isinstance(gpr, pipeline.Pipeline):
+        gpr = gpr[-1].experts_[0]
+    kernel = getattr(gpr, "kernel_", None)
+    manifest = {
+        "format_version": 2,
+        "mode": mode,
+        "npoints": npoints,
+        "kernel": str(kernel) if kernel is not None else None,
+        "zhat": _describe(zhat_path, Zhat),
+        "mesh": {"path": os.path.basename(mesh_path), "arrays": ["x0", "x1"]},
+        "model": {"path": os.path.basename(params_path),
+                  "arrays": {name: list(array.shape) for name, array in params.items()},
+                  "prediction": model_prediction(model)},
+    }
+    manifest_path = f"{prefix}.json"
+    with open(manifest_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    print(f"Saved result arrays described by {manifest_path}")
+
+
+def run_gpr(local=False, mode="exact", npoints=None, output_format="pickle"):
+    """Fits the model and predicts Zhat on the training points, or on an
+    `npoints` x `npoints` create_mesh grid when `npoints` is given.
+
+    `output_format` is one of OUTPUT_FORMATS. With "npy" or "both" the grid is
+    predicted straight into a memory-mapped `.npy` file."""
 
     filename = get_input('https://raw.githubusercontent.com/oceanprotocol/c2d-examples/refs/heads/main/branin_and_gpr/branin.arff')
     if not filename:
         print("Could not retrieve filename.")
         return
 
-    with open(filename) as datafile:
-        datafile.seek(0)
-        res = arff.load(datafile)
-
-    print("Stacking data.")
-    mat = numpy.stack(res["data"])
+    print("Loading data.")
+    mat = load_dataset(filename)
     [X, y] = numpy.split(mat, [2], axis=1)
 
-    print("Building Gaussian Process Regressor (GPR) model")
-    model = gaussian_process.GaussianProcessRegressor()
-    model.fit(X, y)
-    yhat = model.predict(X, return_std=False)
-    Zhat = numpy.reshape(yhat, (npoints, npoints))
+    print(f"Building Gaussian Process Regressor (GPR) model ({mode})")
+    model = build_model(mode, min(GPR_COMPONENTS, len(X)))
+    model.fit(X, numpy.ravel(y) if mode not in ("exact", "tuned") else y)
+    queries = MeshQueries(npoints) if npoints else X
+    npoints = npoints or 15
+    prefix = "gpr" if local else "/data/outputs/result"
+    Zhat = None
+    if output_format in ("npy", "both"):
+        Zhat = numpy.lib.format.open_memmap(f"{prefix}_zhat.npy", mode="w+", dtype=numpy.float64,
+                                            shape=(npoints, npoints))
+    yhat = predict_batched(model, queries, out=None if Zhat is None else Zhat.reshape(-1))
+    Zhat = numpy.reshape(yhat, (npoints, npoints)) if Zhat is None else Zhat
 
     if local:
         print("Plotting results")
         plot(Zhat, npoints)
 
-    filename = "gpr.pickle" if local else "/data/outputs/result"
-    with open(filename, "wb") as pickle_file:
-        print(f"Pickling results in {filename}")
-        pickle.dump(Zhat, pickle_file)
+    if output_format in ("npy", "both"):
+        Zhat.flush()
+        write_result_artifacts(prefix, Zhat, npoints, model, mode)
+    if output_format in ("pickle", "both"):
+        filename = "gpr.pickle" if local else "/data/outputs/result"
+        with open(filename, "wb") as pickle_file:
+            print(f"Pickling results in {filename}")
+            pickle.dump(numpy.asarray(Zhat), pickle_file)
 
 
 if __name__ == "__main__":
-    local = len(sys.argv) == 2 and sys.argv[1] == "local"
-    run_gpr(local)
\ No newline at end of file
+    # Usage: braninDemo.py [local] [exact|tuned|nystroem|rff|experts] [npoints] [pickle|npy|both],
+    # braninDemo.py benchmark, cache-benchmark or mesh-benchmark
+    args = sys.argv[1:]
+    if "benchmark" in args:
+        gpr_benchmark()
+    elif "cache-benchmark" in args:
+        kernel_cache_benchmark()
+    elif "mesh-benchmark" in args:
+        mesh_benchmark()
+    else:
+        local = "local" in args
+        mode = next((arg for arg in args if arg in GPR_MODES), "exact")
+        npoints = next((int(arg) for arg in args if arg.isdigit()), None)
+        output_format = next((arg for arg in args if arg in OUTPUT_FORMATS), "pickle")
+        run_gpr(local, mode, npoints, output_format)
\ No newline at end of file
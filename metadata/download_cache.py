@@ -0,0 +1,292 @@
+"""Shared download helper for the example algorithms in this folder.
+
+Files are streamed to disk in large chunks, interrupted transfers are resumed
+with HTTP Range requests, and finished downloads are kept in a content-addressed
+cache (objects are named by their SHA-256) so repeated jobs skip the network.
+The cache is bounded in size and evicts the least recently used objects first.
+
+Resources that change upstream go through `fetch_conditional`, which
+revalidates the cached copy with ETag / Last-Modified instead of downloading
+it again.
+
+The scripts import this module when it sits next to them and otherwise fall
+back to a plain streamed download without caching, resuming or checksums.
+Raw-code jobs upload only the algorithm file, so to keep these features run
+the script as a compute project and bake this module into the image from the
+project's Dockerfile:
+
+    COPY download_cache.py /opt/ocean/
+    ENV PYTHONPATH=/opt/ocean
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import requests
+
+# The scripts' DOWNLOAD_CHUNK_SIZE, used when this module is not shipped, matches it
+CHUNK_SIZE = 1024 * 1024
+RETRIES = 3
+TIMEOUT = 60
+CACHE_DIR = os.environ.get("OCEAN_DOWNLOAD_CACHE_DIR",
+                           os.path.join(tempfile.gettempdir(), "ocean-download-cache"))
+CACHE_MAX_BYTES = int(os.environ.get("OCEAN_DOWNLOAD_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+# Seconds a conditionally cached response is trusted without asking the server again
+HTTP_CACHE_MAX_AGE = float(os.environ.get("OCEAN_HTTP_CACHE_MAX_AGE", 0))
+
+# Counters for this process, see print_cache_stats
+stats = {"hits": 0, "not_modified": 0, "misses": 0}
+
+
+class ChecksumError(Exception):
+    pass
+
+
+def _url_key(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _object_path(cache_dir, digest):
+    return os.path.join(cache_dir, "objects", digest)
+
+
+def _touch(path):
+    os.utime(path, None)
+    return path
+
+
+def cached_object(url, sha256=None, cache_dir=CACHE_DIR):
+    """Returns the cached path for `url` (or for `sha256` when given), or None."""
+    if sha256:
+        path = _object_path(cache_dir, sha256.lower())
+        return _touch(path) if os.path.exists(path) else None
+
+    index_path = os.path.join(cache_dir, "urls", _url_key(url) + ".json")
+    try:
+        with open(index_path) as index_file:
+            digest = json.load(index_file)["sha256"]
+    except (OSError, ValueError, KeyError):
+        return None
+    path = _object_path(cache_dir, digest)
+    return _touch(path) if os.path.exists(path) else None
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, keep=None):
+    """Deletes least recently used objects until the cache fits in `max_bytes`."""
+    objects_dir = os.path.join(cache_dir, "objects")
+    if not os.path.isdir(objects_dir):
+        return
+    entries = []
+    for entry in os.scandir(objects_dir):
+        if entry.is_file():
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        os.remove(path)
+        total -= size
+
+
+def _read_json(path):
+    try:
+        with open(path) as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _total_length(content_range):
+    """The complete length from a Content-Range header ("bytes 0-9/100" or "bytes */100"), or None."""
+    total = (content_range or "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+def _remove(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _download(url, part_path, session):
+    """Streams `url` into `part_path`, resuming from whatever is already there.
+
+    The ETag / Last-Modified and length of the body are kept in `<part_path>.json`.
+    A resume sends them as If-Range, so a body that changed upstream is fetched
+    again in full instead of being appended to the old head; a partial file
+    without a validator is discarded.
+    """
+    meta_path = part_path + ".json"
+    for attempt in range(RETRIES):
+        meta = _read_json(meta_path)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = meta.get("etag") or meta.get("last_modified")
+        if offset and not validator:
+            # Nothing ties the partial file to the body the server has now
+            _remove(part_path, meta_path)
+            offset = 0
+        headers = {"Range": f"bytes={offset}-", "If-Range": validator} if offset else {}
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+                if response.status_code == 416:
+                    length = _total_length(response.headers.get("Content-Range")) or meta.get("length")
+                    if offset and offset == length:
+                        # The partial file already holds the whole body
+                        _remove(meta_path)
+                        return
+                    _remove(part_path, meta_path)
+                    continue
+                response.raise_for_status()
+                resumed = response.status_code == 206
+                if resumed and not (response.headers.get("Content-Range", "").startswith(f"bytes {offset}-")
+                                    and response.headers.get("ETag", meta.get("etag")) == meta.get("etag")):
+                    # A server that ignored If-Range, or answered with some other range
+                    _remove(part_path, meta_path)
+                    continue
+                if not resumed:
+                    content_length = response.headers.get("Content-Length")
+                    meta = {"etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified"),
+                            "length": int(content_length) if content_length else None}
+                elif not meta.get("length"):
+                    meta["length"] = _total_length(response.headers.get("Content-Range"))
+                with open(meta_path, "w") as meta_file:
+                    json.dump(meta, meta_file)
+                with open(part_path, "ab" if resumed else "wb") as part_file:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        part_file.write(chunk)
+            _remove(meta_path)
+            return
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+            if attempt == RETRIES - 1:
+                raise
+            print(f"Download of {url} interrupted, resuming (attempt {attempt + 2}/{RETRIES})")
+    raise requests.HTTPError(f"Download of {url} could not be completed after {RETRIES} attempts")
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _store(part_path, digest, cache_dir, max_bytes):
+    """Moves a finished download into the object store and returns its path."""
+    path = _object_path(cache_dir, digest)
+    os.replace(part_path, path)
+    evict(cache_dir, max_bytes, keep=path)
+    return path
+
+
+def fetch(url, dest=None, sha256=None, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, session=None):
+    """Returns a local path holding the body of `url`, downloading it only on a cache miss.
+
+    When `sha256` is given the download is verified against it and a mismatch
+    raises ChecksumError. When `dest` is given the cached file is linked or
+    copied there and `dest` is returned instead of the cache path.
+    """
+    path = cached_object(url, sha256, cache_dir)
+    if path:
+        print(f"Using cached copy of {url}")
+        stats["hits"] += 1
+    else:
+        for sub_dir in ("objects", "urls", "partial"):
+            os.makedirs(os.path.join(cache_dir, sub_dir), exist_ok=True)
+        key = _url_key(url)
+        part_path = os.path.join(cache_dir, "partial", key + ".part")
+
+        _download(url, part_path, session or requests.Session())
+        digest = _file_sha256(part_path)
+        if sha256 and digest != sha256.lower():
+            os.remove(part_path)
+            raise ChecksumError(f"Checksum mismatch for {url}: expected {sha256}, got {digest}")
+
+        path = _store(part_path, digest, cache_dir, max_bytes)
+        with open(os.path.join(cache_dir, "urls", key + ".json"), "w") as index_file:
+            json.dump({"url": url, "sha256": digest}, index_file)
+        print(f"Downloaded {url} ({os.path.getsize(path)} bytes)")
+        stats["misses"] += 1
+
+    if not dest:
+        return path
+    if os.path.lexists(dest):
+        os.remove(dest)
+    try:
+        os.link(path, dest)
+    except OSError:
+        shutil.copyfile(path, dest)
+    return dest
+
+
+def fetch_conditional(url, max_age=HTTP_CACHE_MAX_AGE, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES,
+                      session=None):
+    """Returns a local path holding the current body of `url`, a resource that may change.
+
+    The ETag and Last-Modified of the cached copy are sent as If-None-Match and
+    If-Modified-Since, and a 304 reply is served from disk. Within `max_age`
+    seconds of the last check no request is made at all, which allows fully
+    offline runs; if the server cannot be reached a stale copy is served.
+    """
+    for sub_dir in ("objects", "http", "partial"):
+        os.makedirs(os.path.join(cache_dir, sub_dir), exist_ok=True)
+    key = _url_key(url)
+    meta_path = os.path.join(cache_dir, "http", key + ".json")
+    try:
+        with open(meta_path) as meta_file:
+            meta = json.load(meta_file)
+        path = _object_path(cache_dir, meta["sha256"])
+        if not os.path.exists(path):
+            meta, path = {}, None
+    except (OSError, ValueError, KeyError):
+        meta, path = {}, None
+
+    if path and max_age and time.time() - meta.get("checked", 0) < max_age:
+        stats["hits"] += 1
+        return _touch(path)
+
+    headers = {}
+    if path and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if path and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    session = session or requests.Session()
+    try:
+        response = session.get(url, headers=headers, stream=True, timeout=TIMEOUT)
+    except (requests.ConnectionError, requests.Timeout):
+        if not path:
+            raise
+        print(f"Could not reach {url}, using the cached copy")
+        stats["hits"] += 1
+        return _touch(path)
+
+    with response:
+        if response.status_code == 304 and path:
+            stats["not_modified"] += 1
+        else:
+            response.raise_for_status()
+            part_path = os.path.join(cache_dir, "partial", key + ".http")
+            with open(part_path, "wb") as part_file:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    part_file.write(chunk)
+            meta["sha256"] = _file_sha256(part_path)
+            path = _store(part_path, meta["sha256"], cache_dir, max_bytes)
+            meta["etag"] = response.headers.get("ETag")
+            meta["last_modified"] = response.headers.get("Last-Modified")
+            stats["misses"] += 1
+    meta["checked"] = time.time()
+    with open(meta_path, "w") as meta_file:
+        json.dump(meta, meta_file)
+    return _touch(path)
+
+
+def print_cache_stats():
+    print(f"Download cache: {stats['hits']} hits, {stats['not_modified']} revalidated (304), "
+          f"{stats['misses']} misses")
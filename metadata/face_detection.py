@@ -1,16 +1,55 @@
 import cv2
+import numpy
 import requests
 import os
+import queue
 import subprocess
+import sys
 import glob
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from download_cache import fetch
+except ImportError:
+    fetch = None
+
+OUTPUT_VIDEO_PATH = "/data/outputs/output_faces.mp4"
+OUTPUT_FPS = 25
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Frames buffered between the decoder thread and the detector in streaming mode
+STREAM_QUEUE_SIZE = 8
+# Frames handed to a detection worker per task in parallel mode
+PARALLEL_CHUNK_SIZE = 16
+# Keyframe mode: full detection every N frames, tracking in between
+KEYFRAME_INTERVAL = 10
+SCENE_THUMBNAIL_SIZE = (64, 36)
+# Mean absolute gray-level difference between thumbnails that counts as a scene cut
+SCENE_CHANGE_THRESHOLD = 25.0
+# Mean absolute difference around a face below which the box is kept as is
+MOTION_THRESHOLD = 2.0
+TRACK_MIN_SCORE = 0.6
+# Width the cascade runs at in fast mode; boxes are mapped back to full resolution
+DETECTION_WIDTH = 640
+# Fast mode searches around the previous faces and sweeps the whole frame every N frames
+ROI_SWEEP_INTERVAL = 10
+# Padding around a previous face box, relative to its size, searched in ROI passes
+ROI_MARGIN = 0.5
 
 
 # Function to download video from URL
 def download_video(url, output_path):
     print("Downloading video...")
-    response = requests.get(url, stream=True)
+    if fetch:
+        fetch(url, output_path)
+        print("Download complete.")
+        return
+    response = requests.get(url, stream=True, timeout=60)
+    response.raise_for_status()
     with open(output_path, 'wb') as file:
-        for chunk in response.iter_content(chunk_size=1024):
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
             if chunk:
                 file.write(chunk)
     print("Download complete.")
@@ -27,11 +66,37 @@ def extract_frames(video_path, frame_dir):
     subprocess.run(command, check=True)
     print(f"✅ Frames extracted to {frame_dir}")
 
+def load_face_cascade():
+    return cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+
+
+def find_faces_gray(face_cascade, gray, scale=1.0):
+    """Runs the cascade on a gray image, optionally shrunk by `scale`, in full-resolution coordinates."""
+    if scale == 1.0:
+        return face_cascade.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=5, minSize=(30, 30))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    min_size = max(1, round(30 * scale))
+    faces = face_cascade.detectMultiScale(small, scaleFactor=1.3, minNeighbors=5,
+                                          minSize=(min_size, min_size))
+    return [tuple(round(v / scale) for v in box) for box in faces]
+
+
+def find_faces(face_cascade, img):
+    """Runs the Haar cascade on a BGR frame and returns the face boxes."""
+    return find_faces_gray(face_cascade, cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+
+
+def draw_faces(img, faces):
+    for (x, y, w, h) in faces:
+        cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 0), 2)
+    return img
+
+
 def detect_faces(image_dir, output_dir):
     """Detects faces in images and saves processed frames."""
     os.makedirs(output_dir, exist_ok=True)
 
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    face_cascade = load_face_cascade()
 
     images = sorted(glob.glob(os.path.join(image_dir, "*.png")))
     if not images:
@@ -39,12 +104,7 @@ def detect_faces(image_dir, output_dir):
 
     for img_path in images:
         img = cv2.imread(img_path)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=5, minSize=(30, 30))
-
-        for (x, y, w, h) in faces:
-            cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        draw_faces(img, find_faces(face_cascade, img))
 
         output_path = os.path.join(output_dir, os.path.basename(img_path))
         cv2.imwrite(output_path, img)
@@ -55,7 +115,7 @@ def detect_faces(image_dir, output_dir):
     height, width, _ = first_frame.shape
 
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    video_writer = cv2.VideoWriter("/data/outputs/output_faces.mp4", fourcc, 25, (width, height))
+    video_writer = cv2.VideoWriter(OUTPUT_VIDEO_PATH, fourcc, OUTPUT_FPS, (width, height))
 
     for image in images:
         frame_path = os.path.join(output_dir, os.path.basename(image))
@@ -64,25 +124,467 @@ def detect_faces(image_dir, output_dir):
 
     # Release video writer
     video_writer.release()
-    print(f"✅ Final video saved at: /data/outputs/output_faces.mp4")
+    print(f"✅ Final video saved at: {OUTPUT_VIDEO_PATH}")
 
-    camera = cv2.VideoCapture("/data/outputs/output_faces.mp4")
+    camera = cv2.VideoCapture(OUTPUT_VIDEO_PATH)
     print(camera.isOpened())
     print(camera.read())
 
     cv2.destroyAllWindows()
 
 
+def read_frames(video_path):
+    """Decodes a video with OpenCV and yields its frames one at a time."""
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise Exception(f"🚨 Could not open video {video_path}!")
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield frame
+    finally:
+        capture.release()
+
+
+def prefetch(frames, maxsize=STREAM_QUEUE_SIZE):
+    """Decodes frames on a background thread, holding at most `maxsize` in memory."""
+    buffer = queue.Queue(maxsize=maxsize)
+    done = object()
+    errors = []
+    # Set when the consumer stops early, so the producer gives up instead of blocking on a full buffer
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for frame in frames:
+                if not put(frame):
+                    break
+        except Exception as e:
+            errors.append(e)
+        finally:
+            # Closes the source generator, which releases its VideoCapture
+            close = getattr(frames, "close", None)
+            if close:
+                close()
+            put(done)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            frame = buffer.get()
+            if frame is done:
+                break
+            yield frame
+    finally:
+        stop.set()
+        producer.join()
+    if errors:
+        raise errors[0]
+
+
+def annotate_frames(frames, face_cascade):
+    for frame in frames:
+        yield draw_faces(frame, find_faces(face_cascade, frame))
+
+
+def write_video(frames, output_path):
+    """Writes frames to an mp4 file as they arrive and returns the frame count."""
+    video_writer = None
+    count = 0
+    try:
+        for frame in frames:
+            if video_writer is None:
+                height, width, _ = frame.shape
+                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                video_writer = cv2.VideoWriter(output_path, fourcc, OUTPUT_FPS, (width, height))
+            video_writer.write(frame)
+            count += 1
+    finally:
+        if video_writer is not None:
+            video_writer.release()
+    return count
+
+
+def detect_faces_stream(video_path, output_path=OUTPUT_VIDEO_PATH, queue_size=STREAM_QUEUE_SIZE):
+    """Decodes, detects and encodes in one pass without staging frames on disk."""
+    frames = prefetch(read_frames(video_path), maxsize=queue_size)
+    count = write_video(annotate_frames(frames, load_face_cascade()), output_path)
+    if not count:
+        raise Exception("🚨 No frames found for face detection!")
+
+    print(f"✅ Processed {count} frames with face detection.")
+    print(f"✅ Final video saved at: {output_path}")
+
+
+# Cascade owned by each parallel worker process, loaded once by the pool initializer
+_worker_cascade = None
+
+
+def _init_worker():
+    global _worker_cascade
+    _worker_cascade = load_face_cascade()
+
+
+def _detect_chunk(start, grays):
+    began = time.perf_counter()
+    faces = [find_faces_gray(_worker_cascade, gray) for gray in grays]
+    return start, os.getpid(), time.perf_counter() - began, faces
+
+
+def chunk_frames(frames, chunk_size):
+    """Groups frames into (first frame index, frames) chunks."""
+    chunk = []
+    start = 0
+    for index, frame in enumerate(frames):
+        chunk.append(frame)
+        if len(chunk) == chunk_size:
+            yield start, chunk
+            chunk = []
+            start = index + 1
+    if chunk:
+        yield start, chunk
+
+
+def annotate_frames_parallel(frames, pool, chunk_size, max_pending, stats):
+    """Detects faces on a process pool and yields annotated frames in their original order."""
+    pending = deque()
+
+    def drain():
+        start, chunk, future = pending.popleft()
+        result_start, pid, elapsed, faces = future.result()
+        if result_start != start:
+            raise Exception(f"🚨 Chunk {result_start} returned out of sequence, expected {start}!")
+        worker = stats.setdefault(pid, [0, 0.0])
+        worker[0] += len(chunk)
+        worker[1] += elapsed
+        for frame, frame_faces in zip(chunk, faces):
+            yield draw_faces(frame, frame_faces)
+
+    for start, chunk in chunk_frames(frames, chunk_size):
+        grays = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in chunk]
+        pending.append((start, chunk, pool.submit(_detect_chunk, start, grays)))
+        if len(pending) >= max_pending:
+            yield from drain()
+    while pending:
+        yield from drain()
+
+
+def detect_faces_parallel(video_path, output_path=OUTPUT_VIDEO_PATH, workers=None,
+                          chunk_size=PARALLEL_CHUNK_SIZE):
+    """Streams a video through a pool of detection processes, one cascade per worker."""
+    workers = workers or os.cpu_count() or 1
+    stats = {}
+    began = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        frames = prefetch(read_frames(video_path))
+        annotated = annotate_frames_parallel(frames, pool, chunk_size, 2 * workers, stats)
+        count = write_video(annotated, output_path)
+    if not count:
+        raise Exception("🚨 No frames found for face detection!")
+    elapsed = time.perf_counter() - began
+
+    for pid, (frames_done, seconds) in sorted(stats.items()):
+        rate = frames_done / seconds if seconds else 0.0
+        print(f"Worker {pid}: {frames_done} frames in {seconds:.2f}s ({rate:.1f} frames/s)")
+    print(f"✅ Processed {count} frames with face detection on {workers} workers "
+          f"({count / elapsed:.1f} frames/s overall).")
+    print(f"✅ Final video saved at: {output_path}")
+
+
+def scene_thumbnail(gray):
+    return cv2.resize(gray, SCENE_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def track_faces(prev_gray, gray, faces):
+    """Follows each face box into the next frame with motion-gated template matching.
+
+    Boxes over still regions are kept as they are. Boxes over moving regions are
+    re-located inside a search window around their previous position. Returns the
+    propagated boxes and whether every box was found again.
+    """
+    height, width = gray.shape
+    tracked = []
+    for (x, y, w, h) in faces:
+        margin = max(w, h) // 2
+        x0, y0 = max(0, x - margin), max(0, y - margin)
+        x1, y1 = min(width, x + w + margin), min(height, y + h + margin)
+        window = gray[y0:y1, x0:x1]
+        if cv2.absdiff(window, prev_gray[y0:y1, x0:x1]).mean() < MOTION_THRESHOLD:
+            tracked.append((x, y, w, h))
+            continue
+        scores = cv2.matchTemplate(window, prev_gray[y:y + h, x:x + w], cv2.TM_CCOEFF_NORMED)
+        _, score, _, (dx, dy) = cv2.minMaxLoc(scores)
+        if score < TRACK_MIN_SCORE:
+            return tracked, False
+        tracked.append((x0 + dx, y0 + dy, w, h))
+    return tracked, True
+
+
+def keyframe_faces(frames, face_cascade, interval=KEYFRAME_INTERVAL, stats=None):
+    """Yields (frame, faces), running the full cascade only every `interval` frames.
+
+    Frames in between reuse the previous boxes through `track_faces`. A full
+    detection is forced early when the scene cuts or a tracked face is lost.
+    """
+    stats = {} if stats is None else stats
+    stats.setdefault("full", 0)
+    stats.setdefault("tracked", 0)
+    prev_gray = prev_thumb = None
+    faces = []
+    since_full = interval
+    for frame in frames:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = scene_thumbnail(gray)
+        full = since_full >= interval or prev_gray is None
+        if not full and cv2.absdiff(thumb, prev_thumb).mean() > SCENE_CHANGE_THRESHOLD:
+            full = True
+        if not full:
+            faces, found = track_faces(prev_gray, gray, faces)
+            full = not found
+        if full:
+            faces = [tuple(box) for box in find_faces_gray(face_cascade, gray)]
+            since_full = 0
+            stats["full"] += 1
+        else:
+            stats["tracked"] += 1
+        since_full += 1
+        prev_gray, prev_thumb = gray, thumb
+        yield frame, faces
+
+
+def detect_faces_keyframe(video_path, output_path=OUTPUT_VIDEO_PATH, interval=KEYFRAME_INTERVAL):
+    """Streams a video through keyframe detection with tracking in between."""
+    stats = {}
+    tracked = keyframe_faces(prefetch(read_frames(video_path)), load_face_cascade(), interval, stats)
+    count = write_video((draw_faces(frame, faces) for frame, faces in tracked), output_path)
+    if not count:
+        raise Exception("🚨 No frames found for face detection!")
+
+    print(f"✅ Processed {count} frames: {stats['full']} full detections, {stats['tracked']} tracked.")
+    print(f"✅ Final video saved at: {output_path}")
+
+
+def detection_scale(width, detect_width=DETECTION_WIDTH):
+    """Returns the factor that shrinks a frame to at most `detect_width` pixels wide."""
+    if not detect_width or width <= detect_width:
+        return 1.0
+    return detect_width / width
+
+
+def find_faces_roi(face_cascade, gray, faces, scale=1.0):
+    """Re-detects faces only inside windows around the previous frame's boxes."""
+    height, width = gray.shape
+    found = []
+    for (x, y, w, h) in faces:
+        margin = int(max(w, h) * ROI_MARGIN)
+        x0, y0 = max(0, x - margin), max(0, y - margin)
+        x1, y1 = min(width, x + w + margin), min(height, y + h + margin)
+        for (fx, fy, fw, fh) in find_faces_gray(face_cascade, gray[y0:y1, x0:x1], scale):
+            box = (x0 + fx, y0 + fy, fw, fh)
+            if all(box_iou(box, other) < 0.5 for other in found):
+                found.append(box)
+    return found
+
+
+def fast_faces(frames, face_cascade, detect_width=DETECTION_WIDTH, sweep_interval=ROI_SWEEP_INTERVAL,
+               stats=None):
+    """Yields (frame, faces) using downscaled detection and ROI-restricted re-detection.
+
+    `detect_width` caps the width the cascade runs at (None for full resolution).
+    With a `sweep_interval`, only regions around the previous faces are searched
+    between full-frame sweeps every `sweep_interval` frames; None sweeps every frame.
+    """
+    stats = {} if stats is None else stats
+    stats.setdefault("sweeps", 0)
+    stats.setdefault("roi", 0)
+    faces = []
+    for index, frame in enumerate(frames):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        scale = detection_scale(gray.shape[1], detect_width)
+        if sweep_interval and index % sweep_interval:
+            faces = find_faces_roi(face_cascade, gray, faces, scale)
+            stats["roi"] += 1
+        else:
+            faces = [tuple(box) for box in find_faces_gray(face_cascade, gray, scale)]
+            stats["sweeps"] += 1
+        yield frame, faces
+
+
+def detect_faces_fast(video_path, output_path=OUTPUT_VIDEO_PATH, detect_width=DETECTION_WIDTH,
+                      sweep_interval=ROI_SWEEP_INTERVAL):
+    """Streams a video through downscaled, ROI-restricted detection."""
+    stats = {}
+    frames = prefetch(read_frames(video_path))
+    detected = fast_faces(frames, load_face_cascade(), detect_width, sweep_interval, stats)
+    count = write_video((draw_faces(frame, faces) for frame, faces in detected), output_path)
+    if not count:
+        raise Exception("🚨 No frames found for face detection!")
+
+    print(f"✅ Processed {count} frames: {stats['sweeps']} full sweeps, {stats['roi']} ROI passes.")
+    print(f"✅ Final video saved at: {output_path}")
+
+
+def draw_synthetic_face(img, cx, cy, size):
+    """Draws a cartoon face that the frontal Haar cascade picks up."""
+    cv2.ellipse(img, (cx, cy), (int(size * 0.42), int(size * 0.55)), 0, 0, 360, (170, 190, 220), -1)
+    for side in (-1, 1):
+        ex, ey = cx + side * int(size * 0.18), cy - int(size * 0.1)
+        cv2.ellipse(img, (ex, ey), (int(size * 0.09), int(size * 0.05)), 0, 0, 360, (40, 40, 40), -1)
+        brow = ey - int(size * 0.1)
+        cv2.line(img, (ex - int(size * 0.1), brow), (ex + int(size * 0.1), brow), (50, 50, 50),
+                 max(1, size // 25))
+    cv2.line(img, (cx, cy - int(size * 0.05)), (cx, cy + int(size * 0.12)), (120, 140, 170),
+             max(1, size // 30))
+    cv2.ellipse(img, (cx, cy + int(size * 0.25)), (int(size * 0.14), int(size * 0.04)), 0, 0, 360,
+                (60, 60, 120), -1)
+
+
+def synthetic_frames(width=640, height=360, frames=200, seed=0):
+    """Yields faces walking over a textured background, with a scene cut halfway."""
+    rng = numpy.random.default_rng(seed)
+    scenes = [
+        cv2.GaussianBlur(rng.integers(40, 140, (height, width, 3), dtype=numpy.uint8), (0, 0), 3)
+        for _ in range(2)
+    ]
+    # Layout is drawn for 360 lines and scaled to the requested height
+    k = height / 360
+    for index in range(frames):
+        scene = 0 if index < frames // 2 else 1
+        img = scenes[scene].copy()
+        step = index % (frames // 2)
+        if scene == 0:
+            draw_synthetic_face(img, int((120 + step) * k), height // 2, int(80 * k))
+            draw_synthetic_face(img, width - int((140 + step // 2) * k), height // 2 - int(30 * k),
+                                int(60 * k))
+        else:
+            draw_synthetic_face(img, int((200 + step // 2) * k), height // 2 + int(20 * k), int(100 * k))
+        yield img
+
+
+def make_synthetic_video(path, width=640, height=360, frames=200, seed=0):
+    """Writes a synthetic test clip to `path`."""
+    video_writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), OUTPUT_FPS, (width, height))
+    for img in synthetic_frames(width, height, frames, seed):
+        video_writer.write(img)
+    video_writer.release()
+    return path
+
+
+def box_iou(a, b):
+    ix = max(0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union else 0.0
+
+
+def match_boxes(reference, candidates, min_iou=0.5):
+    """Greedily pairs boxes by IoU and returns the number of matches."""
+    unused = list(candidates)
+    matched = 0
+    for ref in reference:
+        best = max(unused, key=lambda box: box_iou(ref, box), default=None)
+        if best is not None and box_iou(ref, best) >= min_iou:
+            unused.remove(best)
+            matched += 1
+    return matched
+
+
+def keyframe_report(video_path=None, intervals=(2, 5, 10, 20)):
+    """Compares keyframe mode against full per-frame detection on a synthetic clip."""
+    video_path = video_path or make_synthetic_video("synthetic_faces.mp4")
+    frames = list(read_frames(video_path))
+    face_cascade = load_face_cascade()
+
+    began = time.perf_counter()
+    reference = [[tuple(box) for box in find_faces(face_cascade, frame)] for frame in frames]
+    full_seconds = time.perf_counter() - began
+    total_reference = sum(len(faces) for faces in reference)
+    print(f"Full detection: {len(frames) / full_seconds:.1f} frames/s, {total_reference} faces")
+
+    for interval in intervals:
+        stats = {}
+        began = time.perf_counter()
+        results = [faces for _, faces in keyframe_faces(frames, face_cascade, interval, stats)]
+        seconds = time.perf_counter() - began
+        matched = sum(match_boxes(ref, faces) for ref, faces in zip(reference, results))
+        predicted = sum(len(faces) for faces in results)
+        recall = matched / total_reference if total_reference else 1.0
+        precision = matched / predicted if predicted else 1.0
+        print(f"Every {interval:>3} frames: {len(frames) / seconds:.1f} frames/s "
+              f"({full_seconds / seconds:.2f}x), recall {recall:.3f}, precision {precision:.3f}, "
+              f"{stats['full']} full detections")
+
+
+def pyramid_benchmark(resolutions=((1280, 720), (1920, 1080), (3840, 2160)), frames=20):
+    """Prints detection frames/s for full-resolution, downscaled and ROI-restricted modes."""
+    face_cascade = load_face_cascade()
+    modes = [
+        ("full resolution", None, None),
+        (f"downscaled to {DETECTION_WIDTH}px", DETECTION_WIDTH, None),
+        (f"ROI, sweep every {ROI_SWEEP_INTERVAL}", None, ROI_SWEEP_INTERVAL),
+        ("downscaled + ROI", DETECTION_WIDTH, ROI_SWEEP_INTERVAL),
+    ]
+    for width, height in resolutions:
+        clip = list(synthetic_frames(width, height, frames))
+        print(f"{width}x{height}:")
+        for name, detect_width, sweep_interval in modes:
+            began = time.perf_counter()
+            found = sum(len(faces) for _, faces in
+                        fast_faces(clip, face_cascade, detect_width, sweep_interval))
+            seconds = time.perf_counter() - began
+            print(f"  {name:<24} {frames / seconds:8.1f} frames/s, {found} faces")
+
+
 if __name__ == "__main__":
     video_url = "https://raw.githubusercontent.com/oceanprotocol/c2d-examples/main/face-detection/face-demographics-walking-and-pause-short.mp4"  # Replace with the actual URL
     video_path = "downloaded_video.mp4"
     frames_dir = "output_frames"
     processed_frames_dir = "processed_frames"
-    output_path = "/data/outputs/output_faces.mp4"
+    # "frames" (the default) is the original ffmpeg/PNG staging pipeline, "stream" never touches disk,
+    # "parallel [workers] [chunk_size]" spreads detection over a process pool,
+    # "keyframe [interval]" detects every N frames and tracks in between,
+    # "keyframe-report" measures keyframe accuracy and speed on a synthetic clip,
+    # "fast [detect_width] [sweep_interval]" downscales and searches around previous faces,
+    # "fast-benchmark" times the fast options at 720p, 1080p and 4K
+    mode = sys.argv[1] if len(sys.argv) > 1 else "frames"
+    if mode == "keyframe-report":
+        keyframe_report()
+        sys.exit(0)
+    if mode == "fast-benchmark":
+        pyramid_benchmark()
+        sys.exit(0)
 
     download_video(video_url, video_path)
-    extract_frames(video_path, frames_dir)
-    detect_faces(frames_dir, processed_frames_dir)
+    if mode == "stream":
+        detect_faces_stream(video_path, OUTPUT_VIDEO_PATH)
+    elif mode == "parallel":
+        workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        chunk_size = int(sys.argv[3]) if len(sys.argv) > 3 else PARALLEL_CHUNK_SIZE
+        detect_faces_parallel(video_path, OUTPUT_VIDEO_PATH, workers=workers, chunk_size=chunk_size)
+    elif mode == "keyframe":
+        interval = int(sys.argv[2]) if len(sys.argv) > 2 else KEYFRAME_INTERVAL
+        detect_faces_keyframe(video_path, OUTPUT_VIDEO_PATH, interval=interval)
+    elif mode == "fast":
+        detect_width = int(sys.argv[2]) if len(sys.argv) > 2 else DETECTION_WIDTH
+        sweep_interval = int(sys.argv[3]) if len(sys.argv) > 3 else ROI_SWEEP_INTERVAL
+        detect_faces_fast(video_path, OUTPUT_VIDEO_PATH, detect_width=detect_width or None,
+                          sweep_interval=sweep_interval or None)
+    else:
+        extract_frames(video_path, frames_dir)
+        detect_faces(frames_dir, processed_frames_dir)
 
     # Cleanup downloaded video
     os.remove(video_path)
\ No newline at end of file
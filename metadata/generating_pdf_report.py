@@ -1,25 +1,164 @@
-import matplotlib.pyplot as plt
+import array
+import codecs
+import json
+import io
+import itertools
+import numpy
 import os
 import requests
+import statistics
+import subprocess
+import sys
+import time
 
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import Table, TableStyle
-from reportlab.lib import colors
-from reportlab.pdfgen import canvas
+try:
+    from download_cache import fetch_conditional, print_cache_stats
+except ImportError:
+    fetch_conditional = None
+
+# matplotlib and reportlab are imported inside the functions that draw, so
+# short jobs and error paths do not pay for loading them
+
+
+def list_table_style():
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle([
+        ('GRID', (1,1), (-1,-1), 0.25, colors.black),
+        ('FONTNAME', (0,0), (0,-1), 'Helvetica-Bold'),
+        ('INNERGRID', (0, 0), (-1, -1), 0.25, colors.black),
+        ('BOX', (0,0), (-1,-1), 0.25, colors.black),
+    ])
+
+# Numeric fields of each ticker that the report ranks: closing price and volume
+RANKED_METRICS = ('c', 'v')
+# For reference, check https://github.com/oceanprotocol/stock-api
+STOCK_API_URL = 'https://stock-api.oceanprotocol.com/stock/stock.json'
+STREAM_CHUNK_SIZE = 64 * 1024
+TABLE_ROW_HEIGHT = 16
 
-LIST_TABLE_STYLE = TableStyle([
-    ('GRID', (1,1), (-1,-1), 0.25, colors.black),
-    ('FONTNAME', (0,0), (0,-1), 'Helvetica-Bold'),
-    ('INNERGRID', (0, 0), (-1, -1), 0.25, colors.black),
-    ('BOX', (0,0), (-1,-1), 0.25, colors.black),
-])
 
 def extract_results():
-    # For reference, check https://github.com/oceanprotocol/stock-api
-    stock_data = requests.get('https://stock-api.oceanprotocol.com/stock/stock.json').json()
+    if fetch_conditional:
+        with open(fetch_conditional(STOCK_API_URL), 'rb') as cached:
+            stock_data = json.load(cached)
+    else:
+        stock_data = requests.get(STOCK_API_URL).json()
 
     return stock_data["results"]
 
+
+class JsonTextStream:
+    """Incremental view over a JSON document arriving as byte chunks.
+
+    Only the text not yet consumed is buffered; values are decoded one at a time
+    with `json.JSONDecoder.raw_decode`.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        if self.eof:
+            raise ValueError("Unexpected end of JSON document")
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.eof = True
+            self.buffer += self.decoder.decode(b"", final=True)
+        else:
+            self.buffer += self.decoder.decode(chunk)
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it ("" at the end)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self.fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in JSON document at {self.buffer[self.pos:self.pos + 20]!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                self.fill()
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof:
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+
+def parse_results_columns(chunks, metrics=RANKED_METRICS):
+    """Streams the "results" array of a stock.json document into compact columns.
+
+    Each ticker object is decoded on its own and only 'T' and `metrics` are kept,
+    in an `array` of doubles per metric, so memory grows with the number of
+    tickers rather than with the size of the document.
+    """
+    stream = JsonTextStream(chunks)
+    symbols = []
+    values = {metric: array.array('d') for metric in metrics}
+    stream.expect("{")
+    while stream.peek() != "}":
+        key = stream.value()
+        stream.expect(":")
+        if key != "results":
+            stream.value()
+        else:
+            stream.expect("[")
+            while stream.peek() != "]":
+                result = stream.value()
+                symbols.append(result['T'])
+                for metric in metrics:
+                    value = result.get(metric)
+                    values[metric].append(numpy.nan if value is None else value)
+                if stream.peek() == ",":
+                    stream.pos += 1
+            stream.expect("]")
+        if stream.peek() == ",":
+            stream.pos += 1
+    stream.expect("}")
+
+    columns = {"T": numpy.array(symbols, dtype=object)}
+    for metric in metrics:
+        columns[metric] = numpy.frombuffer(values[metric], dtype=numpy.float64)
+    return columns
+
+
+def extract_columns(url=STOCK_API_URL, metrics=RANKED_METRICS):
+    """Downloads stock.json as a stream and returns the columns `to_columns` would build.
+
+    With download_cache available the body is revalidated against the local copy
+    (ETag / Last-Modified) and parsed from disk, so an unchanged stock.json is not
+    downloaded again.
+    """
+    if fetch_conditional:
+        with open(fetch_conditional(url), 'rb') as cached:
+            return parse_results_columns(iter(lambda: cached.read(STREAM_CHUNK_SIZE), b''), metrics)
+
+    with requests.get(url, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        return parse_results_columns(response.iter_content(chunk_size=STREAM_CHUNK_SIZE), metrics)
+
+
 def get_top_10_closing_prices(results):
     def sort_func(e):
         return e['price']
@@ -36,7 +175,7 @@ def get_top_10_closing_prices(results):
         key=sort_func
     )[:10]
 
-def get_top_10_trading_volumes(best=True):
+def get_top_10_trading_volumes(results, best=True):
     def sort_func(e):
         return e['volume']
     
@@ -53,6 +192,71 @@ def get_top_10_trading_volumes(best=True):
         key=sort_func
     )[:10]
 
+
+def to_columns(results, metrics=RANKED_METRICS):
+    """Builds a columnar view of the API results: symbols plus one float64 array per metric."""
+    columns = {"T": numpy.array([result['T'] for result in results], dtype=object)}
+    for metric in metrics:
+        columns[metric] = numpy.array([result.get(metric, numpy.nan) for result in results],
+                                      dtype=numpy.float64)
+    return columns
+
+
+def _select(values, k, largest):
+    """Indices of the k largest or smallest values, ties kept in input order, NaN last."""
+    k = min(k, len(values))
+    if k == 0:
+        return numpy.empty(0, dtype=numpy.intp)
+    keyed = -values if largest else values.copy()
+    keyed[numpy.isnan(keyed)] = numpy.inf
+    kth = numpy.partition(keyed, k - 1)[k - 1]
+    # Everything tied with the k-th value is a candidate so the stable order can pick among them
+    candidates = numpy.flatnonzero(keyed <= kth)
+    order = numpy.lexsort((candidates, keyed[candidates]))
+    return candidates[order[:k]]
+
+
+def rank_extremes(columns, metrics=RANKED_METRICS, k=10):
+    """Returns {metric: {"top": indices, "bottom": indices}} for every metric at once.
+
+    Each side is a linear-time partial selection instead of a full sort, and the
+    ordering matches a stable `sorted`: ties keep the order of the input.
+    """
+    return {
+        metric: {"top": _select(columns[metric], k, True), "bottom": _select(columns[metric], k, False)}
+        for metric in metrics
+    }
+
+
+def ranked_rows(columns, indices, metric, label):
+    return [{"symbol": columns['T'][i], label: columns[metric][i].item()} for i in indices]
+
+
+def ranking_benchmark(sizes=(10 ** 5, 10 ** 6), k=10):
+    """Times rank_extremes against the sort-based top 10 helpers on synthetic tickers."""
+    rng = numpy.random.default_rng(0)
+    for n in sizes:
+        results = [
+            {'T': f"T{i}", 'c': float(c), 'v': float(v)}
+            for i, (c, v) in enumerate(zip(rng.lognormal(3, 1, n).round(2), rng.integers(0, 10 ** 7, n)))
+        ]
+        began = time.perf_counter()
+        expected = (get_top_10_closing_prices(results),
+                    get_top_10_trading_volumes(results, best=True),
+                    get_top_10_trading_volumes(results, best=False))
+        sorted_seconds = time.perf_counter() - began
+
+        began = time.perf_counter()
+        columns = to_columns(results)
+        columnar = time.perf_counter()
+        rankings = rank_extremes(columns, k=k)
+        ranked = time.perf_counter()
+        actual = (ranked_rows(columns, rankings['c']["top"], 'c', "price"),
+                  ranked_rows(columns, rankings['v']["top"], 'v', "volume"),
+                  ranked_rows(columns, rankings['v']["bottom"], 'v', "volume"))
+        print(f"{n} tickers: sort {sorted_seconds:.3f}s, columnar view {columnar - began:.3f}s + "
+              f"selection {ranked - columnar:.4f}s, identical: {actual == expected}")
+
 def generate_table_data(top_10_trading_volumes):
     table_top_10_trading_volumes_data = [['Symbol', 'Volume']]
 
@@ -62,59 +266,150 @@ def generate_table_data(top_10_trading_volumes):
     return table_top_10_trading_volumes_data
 
 
-
-if __name__ == "__main__":
-
-    results = extract_results()
-    top_10_closing_prices = get_top_10_closing_prices(results=results)
-
-    categories = [closing_price["symbol"] for closing_price in top_10_closing_prices]
-    values = [closing_price["price"] for closing_price in top_10_closing_prices]
-
-    top_10_best_trading_volumes = get_top_10_trading_volumes(best=True)
-    top_10_worst_trading_volumes = get_top_10_trading_volumes(best=False)
-    table_top_10_best_trading_volumes_data = generate_table_data(top_10_best_trading_volumes)
-    table_top_10_worst_trading_volumes_data = generate_table_data(top_10_worst_trading_volumes)
+def render_bar_chart(categories, values):
+    """Renders the closing price chart to an in-memory PNG for reportlab."""
+    import matplotlib
+    matplotlib.use("agg")
+    import matplotlib.pyplot as plt
+    from reportlab.lib.utils import ImageReader
 
     plt.figure(figsize=(8, 4))
     plt.bar(categories, values)
-    
+
     plt.title('Top 10 Closing Prices')
     plt.xlabel('Stock')
     plt.ylabel('Values')
 
-    # Save the bar chart as an image
-    plt.savefig('bar_chart.png')
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png')
+    plt.close()
+    buffer.seek(0)
+    return ImageReader(buffer)
+
+
+def write_report(pdf_filename, categories, values, best_volumes_data, worst_volumes_data, all_rows=None):
+    """Writes the report; `all_rows`, an iterator of [symbol, close, volume] rows,
+    appends a paginated table of every ticker."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from reportlab.platypus import Table
 
-    # Create a PDF document
-    pdf_filename = '/data/outputs/report.pdf'
+    table_style = list_table_style()
     c = canvas.Canvas(pdf_filename, pagesize=letter)
     c.setFillColor(colors.grey)
     c.setFont("Helvetica-Bold", 24)
     c.drawString(230, 760, "Stock Report")
 
-    image_path = os.path.join(os.getcwd(), "bar_chart.png")
-    c.drawImage(image_path, 50, 400, width=500, height=265)
+    c.drawImage(render_bar_chart(categories, values), 50, 400, width=500, height=265)
 
     c.setFont("Helvetica-Bold", 14)
 
     c.drawString(50, 270, "Top 10 Best Trading Volumes")
-    table_top_10_best_trading_volumes = Table(table_top_10_best_trading_volumes_data)
-    table_top_10_best_trading_volumes.setStyle(LIST_TABLE_STYLE)
+    table_top_10_best_trading_volumes = Table(best_volumes_data)
+    table_top_10_best_trading_volumes.setStyle(table_style)
     table_top_10_best_trading_volumes.wrapOn(c, 200, 350)
     table_top_10_best_trading_volumes.drawOn(c, 150, 20)
-    
+
     c.showPage()
     c.setFillColor(colors.grey)
     c.setFont("Helvetica-Bold", 14)
     c.drawString(50, 760, "Top 10 Worst Trading Volumes")
-    table_top_10_worst_trading_volumes = Table(table_top_10_worst_trading_volumes_data)
-    table_top_10_worst_trading_volumes.setStyle(LIST_TABLE_STYLE)
+    table_top_10_worst_trading_volumes = Table(worst_volumes_data)
+    table_top_10_worst_trading_volumes.setStyle(table_style)
     table_top_10_worst_trading_volumes.wrapOn(c, 200, 350)
     table_top_10_worst_trading_volumes.drawOn(c, 170, 475)
 
+    if all_rows is not None:
+        c.showPage()
+        pages = draw_paginated_table(c, "All Tickers", ['Symbol', 'Close', 'Volume'], all_rows)
+        print(f"Added {pages} pages listing every ticker.")
+
     c.save()
     print("PDF report generated successfully.")
 
-    os.remove('bar_chart.png')
-    print("PDF report moved to /data/outputs.")
\ No newline at end of file
+
+def draw_paginated_table(c, title, header, rows, row_height=TABLE_ROW_HEIGHT):
+    """Streams rows from any iterator into tables on as many pages as they need.
+
+    Only one page of rows is held at a time: each page gets its own Table, is
+    drawn and finished with showPage() before the next rows are read, so time
+    and memory stay linear however many rows come in.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import Table
+
+    table_style = list_table_style()
+    width, height = letter
+    rows = iter(rows)
+    # Continuation pages repeat the title at height - 50, so every table starts below it
+    top = height - 80
+    per_page = int((top - 40) // row_height) - 1
+    page = 0
+    while True:
+        page_rows = list(itertools.islice(rows, per_page))
+        if not page_rows and page:
+            break
+        c.setFillColor(colors.grey)
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(50, height - 50, title if page == 0 else f"{title} (continued)")
+        table = Table([header] + page_rows, rowHeights=row_height)
+        table.setStyle(table_style)
+        _, table_height = table.wrapOn(c, width - 100, top - 40)
+        table.drawOn(c, 50, top - table_height)
+        c.showPage()
+        page += 1
+        if len(page_rows) < per_page:
+            break
+    return page
+
+
+def universe_rows(columns):
+    """Yields one table row per ticker, in the order of the API results."""
+    for symbol, close, volume in zip(columns['T'], columns['c'], columns['v']):
+        yield [symbol, f"{close:,.2f}", f"{volume:,.0f}"]
+
+
+def startup_benchmark(runs=5):
+    """Compares the cold import time of this script with importing the drawing libraries eagerly."""
+    module = os.path.splitext(os.path.basename(__file__))[0]
+    eager = "import matplotlib.pyplot, reportlab.platypus, reportlab.pdfgen.canvas"
+    for label, code in (("lazy (this script)", f"import {module}"),
+                        ("eager matplotlib + reportlab", f"import {module}; {eager}")):
+        timings = []
+        for _ in range(runs):
+            began = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True,
+                           cwd=os.path.dirname(os.path.abspath(__file__)))
+            timings.append(time.perf_counter() - began)
+        print(f"{label:<30} median cold start {statistics.median(timings) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+        ranking_benchmark()
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "startup-benchmark":
+        startup_benchmark()
+        sys.exit(0)
+
+    columns = extract_columns()
+    rankings = rank_extremes(columns, k=10)
+    top_10_closing_prices = ranked_rows(columns, rankings['c']["top"], 'c', "price")
+
+    categories = [closing_price["symbol"] for closing_price in top_10_closing_prices]
+    values = [closing_price["price"] for closing_price in top_10_closing_prices]
+
+    top_10_best_trading_volumes = ranked_rows(columns, rankings['v']["top"], 'v', "volume")
+    top_10_worst_trading_volumes = ranked_rows(columns, rankings['v']["bottom"], 'v', "volume")
+    table_top_10_best_trading_volumes_data = generate_table_data(top_10_best_trading_volumes)
+    table_top_10_worst_trading_volumes_data = generate_table_data(top_10_worst_trading_volumes)
+
+    # "full" appends every ticker of the universe after the top 10 tables
+    all_rows = universe_rows(columns) if "full" in sys.argv[1:] else None
+    write_report('/data/outputs/report.pdf', categories, values,
+                 table_top_10_best_trading_volumes_data, table_top_10_worst_trading_volumes_data, all_rows)
+    print("PDF report moved to /data/outputs.")
+    if fetch_conditional:
+        print_cache_stats()
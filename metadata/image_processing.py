@@ -1,38 +1,470 @@
+import json
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
 import requests
 from io import BytesIO
 from PIL import Image, ImageFilter
 
+try:
+    from download_cache import fetch
+except ImportError:
+    fetch = None
+
+OUTPUT_DIR = "/data/outputs"
+FILTERS = ("blur", "grayscale", "unsharp")
+FILTER_RADIUS = 5
+# Memory the tiled engine may use for one band of input plus filter temporaries
+TILE_MEMORY_CAP = int(os.environ.get("OCEAN_TILE_MEMORY_CAP", 256 * 1024 ** 2))
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff", ".webp")
+# Concurrent downloads in batch mode; filtering uses one process per core
+FETCH_WORKERS = 8
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+# Pipeline operations, called with the image and the optional argument of the step
+OPERATIONS = {
+    "blur": lambda img, radius: img.filter(ImageFilter.GaussianBlur(radius=radius or FILTER_RADIUS)),
+    "grayscale": lambda img, _: img.convert("L"),
+    "unsharp": lambda img, radius: img.filter(ImageFilter.UnsharpMask(radius=radius or FILTER_RADIUS)),
+    "resize": lambda img, size: img.resize(size, Image.LANCZOS),
+}
+# Operations where each output pixel depends only on the same input pixel
+POINTWISE_OPERATIONS = ("grayscale",)
+
+
+def filter_image(img, filter):
+    """Returns `img` with `filter` applied, or None for an unknown filter."""
+    if filter not in FILTERS:
+        return None
+    return OPERATIONS[filter](img, None)
+
 
 def apply_filters(image_url, filter):
     if not filter:
         print("Filter is not provided.")
         return
-    response = requests.get(image_url)
-
-    if response.status_code == 200:
-        img = Image.open(BytesIO(response.content))
+    if fetch:
+        try:
+            img = Image.open(fetch(image_url))
+        except requests.HTTPError as e:
+            print(f"Failed to fetch image: {e}")
+            return
     else:
-        print(f"Failed to fetch image: {response.status_code}")
-        print(response.text[:500])
-    filtered_img = None
+        response = requests.get(image_url)
+
+        if response.status_code == 200:
+            img = Image.open(BytesIO(response.content))
+        else:
+            print(f"Failed to fetch image: {response.status_code}")
+            print(response.text[:500])
     # Apply filter
-    if filter == "blur":
-        blurred_img = img.filter(ImageFilter.GaussianBlur(radius=5))
-        filtered_img = blurred_img
-    elif filter == "grayscale":
-        grayscale_img = img.convert("L")
-        filtered_img = grayscale_img
-    elif filter == "unsharp":
-        unsharp_img = img.filter(ImageFilter.UnsharpMask(radius=5))
-        filtered_img = unsharp_img
-    else:
+    filtered_img = filter_image(img, filter)
+    if filtered_img is None:
         print("Unknown filter.")
         return
 
     return filtered_img
 
+
+def list_sources(sources):
+    """Expands directories into the image files they contain; URLs and file paths pass through."""
+    if isinstance(sources, str):
+        sources = [sources]
+    listed = []
+    for source in sources:
+        if os.path.isdir(source):
+            listed.extend(sorted(
+                os.path.join(source, name) for name in os.listdir(source)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            ))
+        else:
+            listed.append(source)
+    return listed
+
+
+def output_names(sources):
+    """Gives every source a unique file stem for its outputs."""
+    stems = [os.path.splitext(os.path.basename(urlparse(source).path))[0] or "image" for source in sources]
+    return [stem if stems.count(stem) == 1 else f"{stem}_{index}" for index, stem in enumerate(stems)]
+
+
+def load_source(source):
+    """Returns (local path, is temporary) for a local image or a URL.
+
+    URLs are streamed to disk rather than buffered in memory, through the shared
+    download cache when it is available.
+    """
+    if urlparse(source).scheme not in ("http", "https"):
+        return source, False
+    if fetch:
+        return fetch(source), False
+    with requests.get(source, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        with tempfile.NamedTemporaryFile(delete=False) as file:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                file.write(chunk)
+    return file.name, True
+
+
+def filter_file(path, name, filters, output_dir):
+    """Applies every filter to one image file and saves the results (runs in a worker process)."""
+    outputs = []
+    with Image.open(path) as img:
+        img.load()
+        for filter in filters:
+            filtered_img = filter_image(img, filter)
+            output_path = os.path.join(output_dir, f"{name}_{filter}.png")
+            filtered_img.save(output_path)
+            outputs.append(output_path)
+    return outputs
+
+
+def apply_filters_batch(sources, filters, output_dir=OUTPUT_DIR, fetch_workers=FETCH_WORKERS, workers=None):
+    """Filters many images, overlapping downloads with processing.
+
+    `sources` is a directory of images or a list of URLs and paths. Downloads run
+    on a thread pool and each image is handed to a process pool as soon as it is
+    on disk; outputs are written as `{name}_{filter}.png` as each image finishes.
+    Returns the list of written files.
+    """
+    unknown = [filter for filter in filters if filter not in FILTERS]
+    if unknown:
+        raise ValueError(f"Unknown filters: {unknown}")
+    sources = list_sources(sources)
+    names = output_names(sources)
+    os.makedirs(output_dir, exist_ok=True)
+
+    began = time.perf_counter()
+    written = []
+    failed = 0
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetchers, \
+            ProcessPoolExecutor(max_workers=workers) as filterers:
+        fetching = {fetchers.submit(load_source, source): (source, name)
+                    for source, name in zip(sources, names)}
+        filtering = {}
+        while fetching or filtering:
+            done, _ = wait([*fetching, *filtering], return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in fetching:
+                    source, name = fetching.pop(future)
+                    try:
+                        path, temporary = future.result()
+                    except Exception as e:
+                        print(f"Failed to fetch {source}: {e}")
+                        failed += 1
+                        continue
+                    job = filterers.submit(filter_file, path, name, filters, output_dir)
+                    filtering[job] = (source, path if temporary else None)
+                    continue
+
+                source, temporary_path = filtering.pop(future)
+                try:
+                    outputs = future.result()
+                except Exception as e:
+                    print(f"Failed to filter {source}: {e}")
+                    failed += 1
+                else:
+                    written.extend(outputs)
+                    print(f"Saved {', '.join(outputs)}")
+                finally:
+                    if temporary_path:
+                        os.remove(temporary_path)
+    elapsed = time.perf_counter() - began
+
+    done_count = len(sources) - failed
+    print(f"Processed {done_count} images with {len(filters)} filters in {elapsed:.2f}s "
+          f"({done_count / elapsed if elapsed else 0:.1f} images/s)")
+    return written
+
+
+def filter_halo(filter, radius=FILTER_RADIUS, passes=3):
+    """Rows of context a filter reads on each side of an output row.
+
+    Pillow's Gaussian blur is `passes` box blurs whose radius comes from the
+    requested radius; each box pass reads ceil(box radius) + 1 neighbours.
+    UnsharpMask blurs with the same radius, grayscale is per-pixel.
+    """
+    if filter == "grayscale":
+        return 0
+    box_radius = math.sqrt(12 * radius * radius / passes + 1) / 2
+    return passes * (math.ceil(box_radius) + 1)
+
+
+class RowReader:
+    """Decodes horizontal bands of an image file.
+
+    Uncompressed single-tile images (PPM/PGM, BMP, plain TIFF) are read band by
+    band straight from the file; anything else is decoded once in full, which is
+    refused when the decoded image alone exceeds `memory_cap` bytes. The bytes
+    held by that full decode are kept in `resident_bytes`.
+    """
+
+    def __init__(self, path, memory_cap=TILE_MEMORY_CAP):
+        self.path = path
+        # Pillow's decompression bomb limit assumes a full decode; bands never
+        # hold the whole image and memory_cap guards the full decode below
+        max_pixels = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = None
+        try:
+            self.img = Image.open(path)
+        finally:
+            Image.MAX_IMAGE_PIXELS = max_pixels
+        self.size, self.mode = self.img.size, self.img.mode
+        self.resident_bytes = 0
+        self.raw = None
+        if len(self.img.tile) == 1:
+            codec, extents, offset, args = self.img.tile[0][:4]
+            rawmode, stride, orientation = (args, 0, 1) if isinstance(args, str) else (args + (0, 1))[:3]
+            if codec == "raw" and tuple(extents) == (0, 0) + self.size and (stride or rawmode == self.mode):
+                stride = stride or self.size[0] * len(Image.new(self.mode, (1, 1)).tobytes())
+                self.raw = (offset, rawmode, stride, orientation)
+        if self.raw is None:
+            decoded_bytes = self.size[0] * self.size[1] * len(Image.new(self.mode, (1, 1)).tobytes())
+            if decoded_bytes > memory_cap:
+                self.img.close()
+                raise ValueError(f"{path} cannot be read in bands and decodes to {decoded_bytes} bytes, "
+                                 f"above the {memory_cap} byte memory cap; convert it to PPM/PGM, BMP "
+                                 f"or uncompressed TIFF or raise the cap")
+            self.img.load()
+            self.resident_bytes = decoded_bytes
+
+    def read(self, top, bottom):
+        width, height = self.size
+        if self.raw is None:
+            return self.img.crop((0, top, width, bottom))
+        offset, rawmode, stride, orientation = self.raw
+        # Bottom-up files (orientation -1) store the last row first
+        first = top if orientation > 0 else height - bottom
+        with open(self.path, "rb") as file:
+            file.seek(offset + first * stride)
+            data = file.read((bottom - top) * stride)
+        return Image.frombytes(self.mode, (width, bottom - top), data, "raw", rawmode, stride, orientation)
+
+    def close(self):
+        self.img.close()
+
+
+class PngRowWriter:
+    """Encodes a PNG band by band, so the whole output never sits in memory."""
+
+    COLOR_TYPES = {"L": 0, "RGB": 2, "RGBA": 6}
+
+    def __init__(self, path, size, mode):
+        self.file = open(path, "wb")
+        self.compressor = zlib.compressobj()
+        width, height = size
+        self.file.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, self.COLOR_TYPES[mode], 0, 0, 0))
+
+    def _chunk(self, kind, data):
+        self.file.write(struct.pack(">I", len(data)) + kind + data)
+        self.file.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    def write(self, band):
+        data = band.tobytes()
+        stride = len(data) // band.size[1]
+        # Every scanline is prefixed with filter type 0 (none)
+        rows = b"".join(b"\x00" + data[i:i + stride] for i in range(0, len(data), stride))
+        compressed = self.compressor.compress(rows)
+        if compressed:
+            self._chunk(b"IDAT", compressed)
+
+    def close(self):
+        self._chunk(b"IDAT", self.compressor.flush())
+        self._chunk(b"IEND", b"")
+        self.file.close()
+
+
+class PnmRowWriter:
+    """Writes binary PGM/PPM band by band."""
+
+    def __init__(self, path, size, mode):
+        self.file = open(path, "wb")
+        self.file.write(b"%s\n%d %d\n255\n" % (b"P5" if mode == "L" else b"P6", size[0], size[1]))
+
+    def write(self, band):
+        self.file.write(band.tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+class ImageRowWriter:
+    """Fallback for other formats: assembles the output in memory and saves it once."""
+
+    def __init__(self, path, size, mode):
+        self.path = path
+        self.img = Image.new(mode, size)
+        self.top = 0
+
+    def write(self, band):
+        self.img.paste(band, (0, self.top))
+        self.top += band.size[1]
+
+    def close(self):
+        self.img.save(self.path)
+
+
+def open_row_writer(path, size, mode):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".png" and mode in PngRowWriter.COLOR_TYPES:
+        return PngRowWriter(path, size, mode)
+    if extension in (".ppm", ".pgm", ".pnm") and mode in ("L", "RGB"):
+        return PnmRowWriter(path, size, mode)
+    print(f"Cannot stream {extension} {mode} output, assembling {path} in memory")
+    return ImageRowWriter(path, size, mode)
+
+
+def apply_filter_tiled(path, filter, output_path, memory_cap=TILE_MEMORY_CAP):
+    """Filters an image file in full-width bands and writes the result band by band.
+
+    Each band is read with `filter_halo` extra rows on both sides and cropped
+    back after filtering, so the output is bit-identical to filtering the whole
+    image. Bands are sized so that input, halo and filter temporaries stay under
+    `memory_cap` bytes.
+    """
+    if filter not in FILTERS:
+        raise ValueError(f"Unknown filter: {filter}")
+    reader = RowReader(path, memory_cap)
+    width, height = reader.size
+    halo = filter_halo(filter)
+    row_bytes = width * len(Image.new(reader.mode, (1, 1)).tobytes())
+    # The input band, the filtered copy and one intermediate blur live at once,
+    # next to the full image when the reader had to decode it
+    band_rows = max(1, (memory_cap - reader.resident_bytes) // (3 * row_bytes) - 2 * halo)
+
+    writer = None
+    try:
+        for top in range(0, height, band_rows):
+            bottom = min(height, top + band_rows)
+            read_top, read_bottom = max(0, top - halo), min(height, bottom + halo)
+            filtered = filter_image(reader.read(read_top, read_bottom), filter)
+            band = filtered.crop((0, top - read_top, width, bottom - read_top))
+            if writer is None:
+                writer = open_row_writer(output_path, (width, height), band.mode)
+            writer.write(band)
+    finally:
+        reader.close()
+        if writer is not None:
+            writer.close()
+    print(f"Filtered {path} in bands of {band_rows} rows (halo {halo}) into {output_path}")
+    return output_path
+
+
+def parse_step(step):
+    """Turns "blur", "blur:3" or "resize:640x480" into an (operation, argument) tuple."""
+    name, _, arg = step.partition(":")
+    if name not in OPERATIONS:
+        raise ValueError(f"Unknown operation: {step}")
+    if name == "resize":
+        width, height = arg.lower().split("x")
+        return name, (int(width), int(height))
+    return name, float(arg) if arg else None
+
+
+def fuse_chain(steps):
+    """Reorders and drops steps where that only changes the result by 8-bit rounding.
+
+    Grayscale is a per-pixel linear map and Gaussian blur is linear, so a
+    grayscale that follows a blur is moved in front of it and the blur runs on
+    one channel instead of three. Repeated grayscale steps collapse into one.
+    """
+    steps = list(steps)
+    moved = True
+    while moved:
+        moved = False
+        for i in range(1, len(steps)):
+            if steps[i][0] == "grayscale" and steps[i - 1][0] == "blur":
+                steps[i - 1], steps[i] = steps[i], steps[i - 1]
+                moved = True
+    fused = []
+    for step in steps:
+        if not (step[0] == "grayscale" and "grayscale" in (s[0] for s in fused)):
+            fused.append(step)
+    return tuple(fused)
+
+
+def draft_request(chains, size):
+    """Returns (mode, size) for a reduced JPEG decode, or None when an output needs full resolution.
+
+    Drafting is only allowed when every output shrinks the image with a resize
+    before any other spatial operation, so nothing ever runs at the wrong scale.
+    """
+    target = (0, 0)
+    gray = True
+    for chain in chains:
+        spatial = next((step for step in chain if step[0] not in POINTWISE_OPERATIONS), None)
+        if spatial is None or spatial[0] != "resize":
+            return None
+        target = (max(target[0], spatial[1][0]), max(target[1], spatial[1][1]))
+        gray = gray and chain[0][0] == "grayscale"
+    if target[0] >= size[0] or target[1] >= size[1]:
+        return None
+    return ("L" if gray else None), target
+
+
+def run_pipeline(source, outputs, output_dir=OUTPUT_DIR):
+    """Decodes `source` once and writes every output of a declarative pipeline.
+
+    `outputs` maps output file names to chains of steps, for example
+    {"gray_blur.png": ["blur", "grayscale"], "thumb.jpg": ["resize:256x256"]}.
+    Chains are fused with `fuse_chain`, and outputs sharing a prefix of steps
+    reuse its intermediate image instead of recomputing it. JPEG sources are
+    decoded at reduced resolution when every output is smaller than the source.
+    """
+    chains = {name: fuse_chain(parse_step(step) for step in steps) for name, steps in outputs.items()}
+    path, temporary = load_source(source)
+    os.makedirs(output_dir, exist_ok=True)
+    operations = 0
+    try:
+        with Image.open(path) as img:
+            draft = draft_request(chains.values(), img.size) if img.format == "JPEG" else None
+            if draft:
+                img.draft(*draft)
+                print(f"Decoding {source} at reduced size {img.size}")
+            img.load()
+            # Depth-first over the sorted chains, keeping only the current chain's prefixes
+            prefixes = {(): img}
+            for name, chain in sorted(chains.items(), key=lambda item: repr(item[1])):
+                prefixes = {prefix: image for prefix, image in prefixes.items() if chain[:len(prefix)] == prefix}
+                done = max(len(prefix) for prefix in prefixes)
+                result = prefixes[chain[:done]]
+                for i in range(done, len(chain)):
+                    operation, arg = chain[i]
+                    result = OPERATIONS[operation](result, arg)
+                    prefixes[chain[:i + 1]] = result
+                    operations += 1
+                result.save(os.path.join(output_dir, name))
+                print(f"Saved {name}")
+    finally:
+        if temporary:
+            os.remove(path)
+    naive = sum(len(steps) for steps in outputs.values())
+    print(f"Ran {operations} operations for {len(outputs)} outputs ({naive} without sharing or fusion)")
+
 if __name__ == "__main__":
+    if len(sys.argv) > 3 and sys.argv[1] == "batch":
+        # image_processing.py batch blur,grayscale <directory or URL> [URL ...]
+        apply_filters_batch(sys.argv[3:], sys.argv[2].split(","))
+        sys.exit(0)
+    if len(sys.argv) > 4 and sys.argv[1] == "tiled":
+        # image_processing.py tiled unsharp <input file> <output .png/.ppm/.pgm> [memory cap bytes]
+        memory_cap = int(sys.argv[5]) if len(sys.argv) > 5 else TILE_MEMORY_CAP
+        apply_filter_tiled(sys.argv[3], sys.argv[2], sys.argv[4], memory_cap)
+        sys.exit(0)
+    if len(sys.argv) > 3 and sys.argv[1] == "pipeline":
+        # image_processing.py pipeline <URL or file> '{"out.png": ["grayscale", "blur"], ...}'
+        run_pipeline(sys.argv[2], json.loads(sys.argv[3]))
+        sys.exit(0)
     filtered_img = apply_filters(image_url='https://raw.githubusercontent.com/mikolalysenko/lena/master/lena.png', filter='unsharp')
     filename = "/data/outputs/filtered_image.png"
     filtered_img.save(filename)
-    print(f"Filters applied and images saved successfully as {filename}")
\ No newline at end of file
+    print(f"Filters applied and images saved successfully as {filename}")
@@ -1,9 +1,27 @@
+import asyncio
+import contextlib
+import io
 import json
-
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+import numpy
 import requests
-from web3 import Web3
+from eth_utils.abi import get_abi_output_types
+from hexbytes import HexBytes
+from web3 import AsyncHTTPProvider, AsyncWeb3, Web3
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError, TooManyRequests, Web3RPCError
+
+try:
+    from eth_tester.exceptions import TransactionFailed
+except ImportError:  # eth-tester is only installed to run against a local test chain
+    TransactionFailed = ContractLogicError
 import datetime
-import io
 import sys
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
@@ -75,15 +93,27 @@ token_abi = [
         "outputs": [{"name": "", "type": "uint256"}],
         "stateMutability": "view",
         "type": "function"
+    },
+    {"constant": True, "inputs": [], "name": "owner", "outputs": [{"name": "", "type": "address"}],
+     "stateMutability": "view", "type": "function"}
+]
+
+multicall3_abi = [
+    {
+        "inputs": [{"components": [{"name": "target", "type": "address"},
+                                   {"name": "allowFailure", "type": "bool"},
+                                   {"name": "callData", "type": "bytes"}],
+                    "name": "calls", "type": "tuple[]"}],
+        "name": "aggregate3",
+        "outputs": [{"components": [{"name": "success", "type": "bool"},
+                                    {"name": "returnData", "type": "bytes"}],
+                     "name": "returnData", "type": "tuple[]"}],
+        "stateMutability": "payable",
+        "type": "function"
     }
 ]
 
 BASE_RPC_URL = "https://base.drpc.org"  # Base RPC URL
-web3 = Web3(Web3.HTTPProvider(BASE_RPC_URL))
-
-# Ensure the connection to the Base chain
-if web3.is_connected():
-    print("Connected to Base Chain")
 
 # Example Uniswap V2 Factory contract address (replace with actual on Base)
 uniswap_v2_factory_address = "0x8909Dc15e40173Ff4699343b6eB8132c65e18eC6"
@@ -91,16 +121,174 @@ uniswap_v2_factory_address = "0x8909Dc15e40173Ff4699343b6eB8132c65e18eC6"
 USDC_contract = '0xd9AA594F65d163C22072c0eDFC7923A7F3470cC1'
 WETH_contract = '0x4200000000000000000000000000000000000006'
 API_KEY_ASI1 = "<API_KEY>"
-
-# Create contract instance for the Uniswap V2 Factory
-factory_contract = web3.eth.contract(address=web3.to_checksum_address(uniswap_v2_factory_address),
-                                     abi=uniswap_v2_factory_abi)
-
-
-def calculate_market_cap(token_contract, token_symbol, reserve0, reserve1):
+# Multicall3 is deployed at the same address on Base and most other EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+# Base produces a block every 2 seconds
+BLOCK_TIME = 2
+BLOCKS_PER_DAY = 24 * 60 * 60 // BLOCK_TIME
+# Rolling volume windows reported from the Swap index, the longest one sets how far back it reaches
+VOLUME_WINDOWS = (("24h", BLOCKS_PER_DAY), ("7d", 7 * BLOCKS_PER_DAY), ("30d", 30 * BLOCKS_PER_DAY))
+SWAP_INDEX_PATH = os.environ.get("OCEAN_SWAP_INDEX_PATH",
+                                 os.path.join(tempfile.gettempdir(), "ocean-swap-index.sqlite"))
+# Recent blocks fetched again on every update, so a reorg inside this window is picked up
+CONFIRMATION_BLOCKS = 150
+# Opcodes analyze_bytecode reports, PUSH1..PUSH32 carry 1..32 immediate bytes
+REPORTED_OPCODES = {0xff: "selfdestruct", 0xf0: "create", 0xf5: "create2", 0xf4: "delegatecall"}
+PUSH1, PUSH32 = 0x60, 0x7f
+MINT_SIGNATURES = ("mint()", "mint(uint256)", "mint(address)", "mint(address,uint256)",
+                   "mintTo(address,uint256)", "issue(uint256)")
+MINT_SELECTORS = {int.from_bytes(Web3.keccak(text=signature)[:4], "big"): signature for signature in MINT_SIGNATURES}
+CONTRACT_CACHE_PATH = os.environ.get("OCEAN_CONTRACT_CACHE_PATH",
+                                     os.path.join(tempfile.gettempdir(), "ocean-contract-cache.sqlite"))
+SWAP_EVENT_TOPIC = Web3.to_hex(Web3.keccak(text="Swap(address,uint256,uint256,uint256,uint256,address)"))
+# Swap data is four uint256 words: amount0In, amount1In, amount0Out, amount1Out
+SWAP_DATA_SIZE = 4 * 32
+# Blocks per eth_getLogs request; pages the node still rejects are halved until it accepts them
+LOG_PAGE_BLOCKS = 2000
+LOG_FETCH_WORKERS = 4
+# Lower-cased fragments of the errors nodes return when a log query hits a result cap or a
+# block range cap; throttling messages must not match, they are retried rather than split
+LOG_RANGE_ERROR_HINTS = ("query returned more than", "block range", "response size exceeded",
+                         "range is too large", "range too large", "blocks are not supported",
+                         "is limited to a")
+# Calls per aggregate3 / JSON-RPC batch, large batches hit node gas and size limits
+MULTICALL_CHUNK_SIZE = 200
+# Pairs analysed at the same time in scan mode
+SCAN_CONCURRENCY = 16
+# Upper bound on RPC requests per second across all scan tasks; public endpoints throttle above it
+SCAN_REQUESTS_PER_SECOND = 25
+SCAN_RETRIES = 5
+# Base delay in seconds of the exponential backoff between retries
+SCAN_BACKOFF = 0.5
+# JSON-RPC error codes of throttling: EIP-1474 "limit exceeded", and HTTP 429 passed through by some gateways
+RETRYABLE_RPC_CODES = {-32005, 429}
+# Lower-cased fragments of RPC error messages worth retrying: throttling, overloaded or lagging
+# upstream nodes. Anything else, such as "missing trie node", fails the same way on every attempt
+RETRYABLE_ERROR_HINTS = ("rate limit", "too many requests", "limit exceeded", "capacity", "busy",
+                         "temporarily unavailable", "try again", "timeout", "timed out", "header not found")
+# A reverted eth_call raises ContractLogicError from a node and TransactionFailed from eth-tester
+REVERT_ERRORS = (ContractLogicError, TransactionFailed)
+
+
+class CallBatch:
+    """Resolves contract calls in as few round trips as possible, all at one block.
+
+    Calls queued with `add` are sent together on the next `execute` (or `call`):
+    identical calls, same target and calldata, are sent only once, as a single
+    Multicall3 `aggregate3` eth_call or, where Multicall3 is not deployed, as one
+    JSON-RPC batch. Every call runs against `block_number`, so the results form
+    a consistent snapshot.
+    """
+
+    def __init__(self, web3, block_number=None, multicall_address=MULTICALL3_ADDRESS):
+        self.web3 = web3
+        self.block_number = web3.eth.block_number if block_number is None else block_number
+        self.multicall = None
+        if multicall_address:
+            self.multicall = web3.eth.contract(address=web3.to_checksum_address(multicall_address),
+                                               abi=multicall3_abi)
+        self.pending = {}
+        self.results = {}
+        self.round_trips = 0
+
+    @staticmethod
+    def _key(contract_function):
+        return contract_function.address, contract_function._encode_transaction_data()
+
+    def add(self, *contract_functions):
+        for contract_function in contract_functions:
+            key = self._key(contract_function)
+            if key not in self.results:
+                self.pending.setdefault(key, contract_function)
+
+    def call(self, contract_function):
+        """Returns the result of one call like `.call()` would, sending the queued calls if needed.
+
+        A reverted call raises ContractLogicError.
+        """
+        key = self._key(contract_function)
+        if key not in self.results:
+            self.add(contract_function)
+            self.execute()
+        return self._result(key)
+
+    def _result(self, key):
+        result = self.results[key]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def execute(self):
+        for chunk in self._take_pending():
+            replies = self._aggregate(chunk) if self.multicall is not None else None
+            if replies is None:
+                replies = self._json_rpc_batch(chunk)
+            self._store(chunk, replies)
+
+    def _take_pending(self):
+        calls = list(self.pending.items())
+        self.pending = {}
+        return [calls[i:i + MULTICALL_CHUNK_SIZE] for i in range(0, len(calls), MULTICALL_CHUNK_SIZE)]
+
+    def _store(self, calls, replies):
+        self.round_trips += 1
+        for (key, contract_function), (success, data) in zip(calls, replies):
+            self.results[key] = self._decode(contract_function, success, data)
+
+    def _aggregate_function(self, calls):
+        return self.multicall.functions.aggregate3([(address, True, HexBytes(data)) for (address, data), _ in calls])
+
+    def _aggregate(self, calls):
+        try:
+            return self._aggregate_function(calls).call(block_identifier=self.block_number)
+        except BadFunctionCallOutput:
+            # Nothing deployed at the Multicall3 address on this chain
+            self.multicall = None
+            return None
+
+    def _batch_payload(self, calls):
+        block = hex(self.block_number)
+        return [("eth_call", [{"to": address, "data": data}, block]) for (address, data), _ in calls]
+
+    @staticmethod
+    def _batch_replies(responses):
+        return [("error" not in response, HexBytes(response.get("result") or b"")) for response in responses]
+
+    def _json_rpc_batch(self, calls):
+        try:
+            responses = self.web3.provider.make_batch_request(self._batch_payload(calls))
+        except (AttributeError, NotImplementedError):
+            responses = None
+        if not isinstance(responses, list):
+            # The provider (eth-tester, or a node without batch support) takes one call at a time
+            return [self._single_call(address, data) for (address, data), _ in calls]
+        return self._batch_replies(responses)
+
+    def _single_call(self, address, data):
+        try:
+            return True, self.web3.eth.call({"to": address, "data": data}, self.block_number)
+        except REVERT_ERRORS:
+            return False, b""
+
+    def _decode(self, contract_function, success, data):
+        output_types = get_abi_output_types(contract_function.abi)
+        if not success:
+            return ContractLogicError(f"{contract_function.fn_name}() reverted on {contract_function.address}")
+        if not output_types:
+            return None
+        try:
+            values = self.web3.codec.decode(output_types, data)
+        except Exception as e:
+            return BadFunctionCallOutput(f"Could not decode {contract_function.fn_name}(): {e}")
+        values = [self.web3.to_checksum_address(value) if output_type == "address" else value
+                  for output_type, value in zip(output_types, values)]
+        return values[0] if len(values) == 1 else values
+
+
+def calculate_market_cap(calls, token_contract, token_symbol, reserve0, reserve1):
     try:
         # Fetch total supply
-        total_supply = token_contract.functions.totalSupply().call()
+        total_supply = calls.call(token_contract.functions.totalSupply())
 
         # Determine price based on liquidity reserves
         price_per_token = reserve1 / reserve0 if reserve0 > 0 else 0
@@ -114,27 +302,30 @@ def calculate_market_cap(token_contract, token_symbol, reserve0, reserve1):
         print(f"Error calculating market cap: {e}")
 
 
-def check_minting_ability(token_contract, token_name):
-    try:
-        token_contract.functions.mint().call()
+def check_minting_ability(token_contract, token_name, findings):
+    """Reports a token as MINTABLE when the `analyze_contract` findings list mint functions.
+
+    Calling mint() would also succeed on an address without code or on a
+    token whose fallback accepts any call, so the dispatcher is read instead.
+    """
+    if findings["mint_functions"]:
         print(
             f"Mint status: MINTABLE, token address: {token_contract.address}, token name: {token_name}"
         )
         print(
             f"Total Supply Status: NOT FIXED, token address: {token_contract.address}, token name: {token_name}")
         return "MINTABLE", "NOT FIXED"
-    except:
-        print(
-            f"Mint status: NOT MINTABLE, token address: {token_contract.address}, token name: {token_name}"
-        )
-        print(
-            f"Total Supply Status: FIXED, token address: {token_contract.address}, token name: {token_name}")
-        return "NOT MINTABLE", "FIXED"
+    print(
+        f"Mint status: NOT MINTABLE, token address: {token_contract.address}, token name: {token_name}"
+    )
+    print(
+        f"Total Supply Status: FIXED, token address: {token_contract.address}, token name: {token_name}")
+    return "NOT MINTABLE", "FIXED"
 
 
-def check_ownership_status(token_contract):
+def check_ownership_status(calls, token_contract):
     try:
-        owner_address = token_contract.functions.owner().call()
+        owner_address = calls.call(token_contract.functions.owner())
         if owner_address == "0x0000000000000000000000000000000000000000":
             print(f"RENOUNCED for token {token_contract.address}")
             return "RENOUNCED"
@@ -145,80 +336,337 @@ def check_ownership_status(token_contract):
         print("Ownership function not found")
 
 
-def get_token_age(web3, token_address):
-    try:
-        # Get the transaction that created the contract
-        tx_hash = web3.eth.get_transaction_receipt(token_address).transactionHash
-        tx_details = web3.eth.get_transaction(tx_hash)
+class ContractCache:
+    """SQLite cache of contract facts that never change once known.
+
+    Holds the creation block of each address, the code hash deployed at it and
+    the `analyze_bytecode` findings per code hash, so clones and proxies that
+    share bytecode are disassembled once.
+    """
+
+    def __init__(self, path=CONTRACT_CACHE_PATH):
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS creations (
+                address TEXT PRIMARY KEY,
+                block_number INTEGER NOT NULL,
+                timestamp INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS code_hashes (
+                address TEXT PRIMARY KEY,
+                code_hash TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS code_analysis (
+                code_hash TEXT PRIMARY KEY,
+                findings TEXT NOT NULL
+            );
+        """)
+
+    def creation(self, address):
+        return self.db.execute("SELECT block_number, timestamp FROM creations WHERE address = ?",
+                               (address.lower(),)).fetchone()
+
+    def store_creation(self, address, block_number, timestamp):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO creations VALUES (?, ?, ?)",
+                            (address.lower(), block_number, timestamp))
+        return block_number, timestamp
+
+    def findings_for_address(self, address):
+        row = self.db.execute("SELECT findings FROM code_hashes JOIN code_analysis USING (code_hash) "
+                              "WHERE address = ?", (address.lower(),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def findings_for_code_hash(self, code_hash):
+        row = self.db.execute("SELECT findings FROM code_analysis WHERE code_hash = ?", (code_hash,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def store_findings(self, address, code_hash, findings):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO code_analysis VALUES (?, ?)", (code_hash, json.dumps(findings)))
+            self.db.execute("INSERT OR REPLACE INTO code_hashes VALUES (?, ?)", (address.lower(), code_hash))
+        return findings
+
+    def close(self):
+        self.db.close()
+
+
+def find_contract_creation(web3, address, head, contract_cache):
+    """Returns (block number, timestamp) of the block that deployed `address`.
+
+    Whether an address has code is monotonic over blocks for a contract that was
+    never destroyed, so a binary search over eth_getCode finds the first block
+    with code in about log2(head) calls (~25 on Base). This needs an archive RPC.
+    """
+    cached = contract_cache.creation(address)
+    if cached:
+        return cached
+    if not web3.eth.get_code(address, head):
+        raise ValueError(f"No contract code at {address}")
+    low, high = 0, head
+    while low < high:
+        middle = (low + high) // 2
+        if web3.eth.get_code(address, middle):
+            high = middle
+        else:
+            low = middle + 1
+    return contract_cache.store_creation(address, low, web3.eth.get_block(low)["timestamp"])
+
 
-        # Get block details
-        creation_block = tx_details["blockNumber"]
-        block_details = web3.eth.get_block(creation_block)
-        creation_timestamp = block_details["timestamp"]
+def format_token_age(token_address, creation_timestamp):
+    # Convert to human-readable format
+    creation_date = datetime.datetime.utcfromtimestamp(creation_timestamp)
+    current_date = datetime.datetime.utcnow()
+    token_age_days = (current_date - creation_date).days
 
-        # Convert to human-readable format
-        creation_date = datetime.datetime.utcfromtimestamp(creation_timestamp)
-        current_date = datetime.datetime.utcnow()
-        token_age_days = (current_date - creation_date).days
+    return f"Token {token_address} age: {token_age_days} days"
 
-        return f"Token {token_address} age: {token_age_days} days"
+
+def get_token_age(web3, token_address, contract_cache, latest_block=None):
+    try:
+        if latest_block is None:
+            latest_block = web3.eth.block_number
+        _, creation_timestamp = find_contract_creation(web3, token_address, latest_block, contract_cache)
+        return format_token_age(token_address, creation_timestamp)
 
     except Exception as e:
         return f"Error fetching token age: {e}"
 
 
-def check_self_destruct(web3, contract_address):
-    bytecode = web3.eth.get_code(contract_address).hex()
-    if "ff" in bytecode or "f0" in bytecode:
+def strip_metadata(code):
+    """Drops the CBOR metadata that Solidity appends after the runtime code.
+
+    Its length sits in the last two bytes and it starts with a CBOR map header.
+    """
+    if len(code) >= 2:
+        length = int.from_bytes(code[-2:], "big")
+        if 0 < length <= len(code) - 2 and 0xa1 <= code[-2 - length] <= 0xb7:
+            return code[:-2 - length]
+    return code
+
+
+def analyze_bytecode(code):
+    """Disassembles runtime bytecode in one pass, stepping over PUSH immediates.
+
+    Returns which REPORTED_OPCODES occur as instructions, and the mint-style
+    function selectors (MINT_SELECTORS) the dispatcher pushes for comparison.
+    """
+    code = strip_metadata(bytes(code))
+    findings = dict.fromkeys(REPORTED_OPCODES.values(), False)
+    mint_functions = []
+    position = 0
+    while position < len(code):
+        opcode = code[position]
+        if PUSH1 <= opcode <= PUSH32:
+            size = opcode - PUSH1 + 1
+            # Selectors with leading zero bytes are pushed with fewer than four bytes
+            if size <= 4:
+                signature = MINT_SELECTORS.get(int.from_bytes(code[position + 1:position + 1 + size], "big"))
+                if signature and signature not in mint_functions:
+                    mint_functions.append(signature)
+            position += 1 + size
+            continue
+        if opcode in REPORTED_OPCODES:
+            findings[REPORTED_OPCODES[opcode]] = True
+        position += 1
+    findings["mint_functions"] = mint_functions
+    return findings
+
+
+def analyze_contract(web3, contract_address, contract_cache, bytecode=None):
+    """Returns `analyze_bytecode` findings for a contract, cached per address and per code hash.
+
+    The code is only downloaded for addresses not seen before, and only
+    disassembled for code hashes not seen before.
+    """
+    findings = contract_cache.findings_for_address(contract_address)
+    if findings is not None:
+        return findings
+    if bytecode is None:
+        bytecode = web3.eth.get_code(contract_address)
+    if not bytecode:
+        # Not a contract (yet), nothing worth remembering
+        return analyze_bytecode(bytecode)
+    code_hash = Web3.to_hex(Web3.keccak(bytes(bytecode)))
+    findings = contract_cache.findings_for_code_hash(code_hash)
+    if findings is None:
+        findings = analyze_bytecode(bytecode)
+    return contract_cache.store_findings(contract_address, code_hash, findings)
+
+
+def check_self_destruct(web3, contract_address, contract_cache, bytecode=None):
+    findings = analyze_contract(web3, contract_address, contract_cache, bytecode=bytecode)
+    if findings["create"] or findings["create2"]:
+        print("Contract Creation: YES (CREATE/CREATE2 Opcode Found)")
+    if findings["delegatecall"]:
+        print("Delegatecall: YES (Code Can Run Another Contract's Logic, e.g. a Proxy)")
+    if findings["mint_functions"]:
+        print(f"Mint Functions: {', '.join(findings['mint_functions'])}")
+    if findings["selfdestruct"]:
         print("YES (Self-Destruct Opcode Found)")
         return "YES"
     print("NO (Contract is Permanent)")
     return "NO"
 
 
-def get_24h_volume(pair_contract):
-    try:
-        latest_block = web3.eth.block_number
-        blocks_per_day = 24 * 60 * 60 // 12
-        past_block = max(0, latest_block - blocks_per_day)
+def swap_log_filter(pair_address, from_block, to_block):
+    return {
+        "fromBlock": from_block,
+        "toBlock": to_block,
+        "address": pair_address,
+        "topics": [SWAP_EVENT_TOPIC]
+    }
+
 
-        # Swap event signature
-        swap_event_signature = web3.keccak(text="Swap(address,uint256,uint256,uint256,uint256,address)").hex()
+def log_pages(from_block, to_block):
+    """Splits an inclusive block range into LOG_PAGE_BLOCKS sized pages."""
+    return [(start, min(start + LOG_PAGE_BLOCKS - 1, to_block))
+            for start in range(from_block, to_block + 1, LOG_PAGE_BLOCKS)]
 
-        # Get Swap events from past 24h
-        logs = web3.eth.get_logs({
-            "fromBlock": past_block,
-            "toBlock": latest_block,
-            "address": pair_contract.address,
-            "topics": [swap_event_signature if swap_event_signature.startswith('0x') else '0x' + swap_event_signature]
-        })
 
-        total_volume_token0 = 0
-        total_volume_token1 = 0
+def is_log_range_error(error):
+    """True for eth_getLogs failures that a smaller block range avoids (result caps and range caps)."""
+    message = str(error).lower()
+    return isinstance(error, (Web3RPCError, ValueError)) and any(hint in message for hint in LOG_RANGE_ERROR_HINTS)
 
-        if not logs:
-            print("No swaps detected in the last 24 hours.")
-            return 0, 0
 
-        # Process each log
+def fetch_log_range(web3, pair_address, from_block, to_block):
+    """Fetches Swap logs for one page, halving the range for as long as the node rejects it."""
+    try:
+        return web3.eth.get_logs(swap_log_filter(pair_address, from_block, to_block))
+    except Exception as e:
+        if from_block == to_block or not is_log_range_error(e):
+            raise
+    middle = (from_block + to_block) // 2
+    return (fetch_log_range(web3, pair_address, from_block, middle)
+            + fetch_log_range(web3, pair_address, middle + 1, to_block))
+
+
+def fetch_swap_logs(web3, pair_address, from_block, to_block):
+    """Fetches the Swap logs of a block range as LOG_FETCH_WORKERS parallel pages, in block order."""
+    with ThreadPoolExecutor(max_workers=LOG_FETCH_WORKERS) as executor:
+        pages = executor.map(lambda page: fetch_log_range(web3, pair_address, *page),
+                             log_pages(from_block, to_block))
+        return [log for page in pages for log in page]
+
+
+def uint256_limbs(data, columns):
+    """Views concatenated 32-byte big-endian words as a (rows, columns, 8) array of 32-bit limbs."""
+    return numpy.frombuffer(data, dtype=">u4").reshape(-1, columns, 8)
+
+
+def uint256_sums(limbs):
+    """Exact uint256 totals per column of `uint256_limbs` output.
+
+    Each 32-bit limb column is summed in uint64, which cannot overflow below 2**32
+    rows, and the limb sums are recombined as Python ints.
+    """
+    limb_sums = limbs.sum(axis=0, dtype=numpy.uint64)
+    return [sum(int(limb) << (32 * (7 - position)) for position, limb in enumerate(column))
+            for column in limb_sums]
+
+
+class SwapIndex:
+    """SQLite index of the Swap events of each pair, updated incrementally.
+
+    Events are keyed by (pair, block number, log index) and keep their amounts as
+    32-byte big-endian blobs, so uint256 values stay exact. An update fetches only
+    the blocks after the last indexed one, plus the last CONFIRMATION_BLOCKS
+    blocks, which are replaced to pick up reorgs. Events older than the longest
+    VOLUME_WINDOWS window are dropped.
+    """
+
+    def __init__(self, path=SWAP_INDEX_PATH):
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS swaps (
+                pair TEXT NOT NULL,
+                block_number INTEGER NOT NULL,
+                log_index INTEGER NOT NULL,
+                transaction_hash TEXT NOT NULL,
+                sender TEXT NOT NULL,
+                recipient TEXT NOT NULL,
+                amount0_in BLOB NOT NULL,
+                amount1_in BLOB NOT NULL,
+                amount0_out BLOB NOT NULL,
+                amount1_out BLOB NOT NULL,
+                PRIMARY KEY (pair, block_number, log_index)
+            );
+            CREATE TABLE IF NOT EXISTS pairs (
+                pair TEXT PRIMARY KEY,
+                last_block INTEGER NOT NULL
+            );
+        """)
+
+    def fetch_range(self, pair_address, head):
+        """Returns the inclusive block range an update up to `head` has to fetch."""
+        window_start = max(0, head - max(blocks for _, blocks in VOLUME_WINDOWS))
+        row = self.db.execute("SELECT last_block FROM pairs WHERE pair = ?", (pair_address,)).fetchone()
+        if row is None or row[0] < window_start:
+            return window_start, head
+        return max(window_start, min(row[0], head) - CONFIRMATION_BLOCKS + 1), head
+
+    def store(self, pair_address, from_block, to_block, logs):
+        """Replaces the indexed events of `from_block`..`to_block` with `logs`."""
+        window_start = max(0, to_block - max(blocks for _, blocks in VOLUME_WINDOWS))
+        rows = []
         for log in logs:
-            data = web3.eth.contract(address=pair_contract.address, abi=pair_abi).events.Swap().process_log(log)
-            total_volume_token0 += data["args"]["amount0In"]
-            total_volume_token1 += data["args"]["amount1In"]
+            data = bytes(log["data"])
+            if len(data) != SWAP_DATA_SIZE:
+                continue
+            rows.append((pair_address, log["blockNumber"], log["logIndex"], Web3.to_hex(log["transactionHash"]),
+                         Web3.to_hex(bytes(log["topics"][1])[-20:]), Web3.to_hex(bytes(log["topics"][2])[-20:]),
+                         data[:32], data[32:64], data[64:96], data[96:]))
+        with self.db:
+            self.db.execute("DELETE FROM swaps WHERE pair = ? AND (block_number >= ? OR block_number < ?)",
+                            (pair_address, from_block, window_start))
+            self.db.executemany("INSERT OR REPLACE INTO swaps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.db.execute("INSERT OR REPLACE INTO pairs VALUES (?, ?)", (pair_address, to_block))
+        return len(rows)
+
+    def volumes(self, pair_address, head):
+        """Returns {window: (amount0In total, amount1In total)} for each of VOLUME_WINDOWS ending at `head`."""
+        volumes = {}
+        for label, blocks in VOLUME_WINDOWS:
+            rows = self.db.execute("SELECT amount0_in, amount1_in FROM swaps "
+                                   "WHERE pair = ? AND block_number > ? AND block_number <= ?",
+                                   (pair_address, head - blocks, head))
+            limbs = uint256_limbs(b"".join(amount0 + amount1 for amount0, amount1 in rows), 2)
+            volumes[label] = tuple(uint256_sums(limbs))
+        return volumes
+
+    def close(self):
+        self.db.close()
+
+
+def print_volumes(pair_address, volumes):
+    for label, (total_volume_token0, total_volume_token1) in volumes.items():
+        if total_volume_token0 == 0 and total_volume_token1 == 0:
+            print(f"No swaps detected in the last {label}.")
+        else:
+            print(f"{label} Volume: {total_volume_token0} Token0, {total_volume_token1} Token1 for pair {pair_address}")
 
-        print(f"24h Volume: {total_volume_token0} Token0, {total_volume_token1} Token1 for pair {pair_address}")
-        return total_volume_token0, total_volume_token1
+
+def get_volumes(web3, swap_index, pair_contract, latest_block):
+    """Brings the Swap index of the pair up to `latest_block` and prints its rolling volumes."""
+    try:
+        from_block, to_block = swap_index.fetch_range(pair_contract.address, latest_block)
+        logs = fetch_swap_logs(web3, pair_contract.address, from_block, to_block)
+        swap_index.store(pair_contract.address, from_block, to_block, logs)
+        volumes = swap_index.volumes(pair_contract.address, latest_block)
+        print_volumes(pair_contract.address, volumes)
+        return volumes
 
     except Exception as e:
-        print(f"Error fetching 24h volume: {e}")
+        print(f"Error fetching volume: {e}")
 
 
-def get_liquidity_status(pair_contract, token_contract, is_token0=True):
+def get_liquidity_status(calls, pair_contract, token_contract, is_token0=True):
     try:
-        reserves = pair_contract.functions.getReserves().call()
+        reserves = calls.call(pair_contract.functions.getReserves())
         reserve = reserves[0] if is_token0 else reserves[1]
 
-        total_supply = token_contract.functions.totalSupply().call()
+        total_supply = calls.call(token_contract.functions.totalSupply())
 
         if total_supply == 0:
             return "UNKNOWN"
@@ -236,12 +684,23 @@ def get_liquidity_status(pair_contract, token_contract, is_token0=True):
         return f"Error computing liquidity status: {e}"
 
 
-def find_pair_by_token(token_address):
-    pair_address = factory_contract.functions.getPair(web3.to_checksum_address(token_address),
-                                                      web3.to_checksum_address(USDC_contract)).call()
+def get_factory_contract(web3):
+    """The Uniswap V2 Factory contract, bound to a Web3 or AsyncWeb3 instance."""
+    return web3.eth.contract(address=Web3.to_checksum_address(uniswap_v2_factory_address),
+                             abi=uniswap_v2_factory_abi)
+
+
+def find_pair_by_token(calls, token_address):
+    factory_contract = get_factory_contract(calls.web3)
+    usdc_pair = factory_contract.functions.getPair(Web3.to_checksum_address(token_address),
+                                                   Web3.to_checksum_address(USDC_contract))
+    weth_pair = factory_contract.functions.getPair(Web3.to_checksum_address(token_address),
+                                                   Web3.to_checksum_address(WETH_contract))
+    # Both lookups go out together, the WETH one is only read when there is no USDC pair
+    calls.add(usdc_pair, weth_pair)
+    pair_address = calls.call(usdc_pair)
     if pair_address == '0x0000000000000000000000000000000000000000':
-        pair_address = factory_contract.functions.getPair(web3.to_checksum_address(token_address),
-                                                          web3.to_checksum_address(WETH_contract)).call()
+        pair_address = calls.call(weth_pair)
     if pair_address == '0x0000000000000000000000000000000000000000':
         print(f"Pair could not be found for {token_address} backed by WETH or USDC.")
         return
@@ -263,107 +722,442 @@ def draw_formatted_line(c, x, y, line):
     c.drawText(text_obj)
 
 
-# input token address from factory_contract.functions.allPairs(250).call()
-input_token_address = "0xe24A17BFF5E3986C603Bf6E90c892cbe6b07ad51"
-
-pair_address = find_pair_by_token(token_address=input_token_address)
-if pair_address is None:
-    print("Pair could not be found! Quit execution of the algorithm...")
-    quit()
-
-buffer = io.StringIO()
-sys.stdout = buffer
-print(f"Liquidity Pair Address: {pair_address}")
-pair_contract = web3.eth.contract(address=web3.to_checksum_address(pair_address), abi=pair_abi)
-
-# Get total supply of LP tokens
-total_lp_tokens = pair_contract.functions.totalSupply().call()
-print(f"Total Supply of LP Tokens: {total_lp_tokens}")
-
-# Get token addresses
-token_0 = pair_contract.functions.token0().call()
-token_1 = pair_contract.functions.token1().call()
-if token_0 != USDC_contract and token_0 != WETH_contract:
-    input_token = token_0
-else:
-    input_token = token_1
-token_contract = web3.eth.contract(address=input_token, abi=token_abi)
-
-# Get token names and symbols
-token_name = token_contract.functions.name().call()
-token_symbol = token_contract.functions.symbol().call()
-print(f"Token: {token_name} ({token_symbol}) for pair {pair_address}")
-
-# Fetch liquidity reserves
-liquidity_status_0 = get_liquidity_status(pair_contract=pair_contract, token_contract=token_contract)
-print(f"Liquidity status for token 0 {token_contract.address}: {liquidity_status_0}")
-
-# Calculate market cap
-reserves = pair_contract.functions.getReserves().call()
-market_cap_0 = calculate_market_cap(token_contract=token_contract, token_symbol=token_symbol,
-                                    reserve0=reserves[0],
-                                    reserve1=reserves[1])
-
-# Check if each token from the pair is mintable
-mintable0, ts_status0 = check_minting_ability(token_contract, token_name)
-
-# Check if each token has owner renounced or not
-ownership0 = check_ownership_status(token_contract)
-
-# Calculate token age
-get_token_age(web3=web3, token_address=token_contract.address)
-
-# Check if selfdestruct function exists
-selfdestruct0 = check_self_destruct(web3=web3, contract_address=token_contract.address)
-
-# Compute 24h Volume of the pair
-total_volume_token0, total_volume_token1 = get_24h_volume(pair_contract=pair_contract)
-
-sys.stdout = sys.__stdout__
-
-# Get all printed content
-output_text = buffer.getvalue()
-
-headers = {
-    "Content-Type": "application/json",
-    "Authorization": "bearer " + API_KEY_ASI1,
-}
-payload = json.dumps({
-            "model": "asi1-mini",
-            "messages": [
-                {
-                    "role": "user",
-                    "content": f"Please provide positive aspects, potential risks and recommendations regarding this token with the following characteristics: {output_text}"
-                }
-            ],
-            "temperature": 0,
-            "stream": False
-        })
-response = requests.post('https://api.asi1.ai/v1/chat/completions', headers=headers, data=payload).json()
-output_llm = response['thought'][0]
-output_text += output_llm
-
-# Save to PDF
-pdf_filename = '/data/outputs/report.pdf'
-c = canvas.Canvas(pdf_filename, pagesize=letter)
-width, height = letter
-
-title = f"Uniswap V2 Pair Characteristics"
-c.setFont("Helvetica-Bold", 16)
-c.drawCentredString(width / 2, height - 40, title)
-
-# Start writing output text below title
-c.setFont("Helvetica", 10)
-lines = output_text.split("\n")
-y = height - 70  # Start below title
-
-for line in lines:
-    if y < 40:
-        c.showPage()
-        y = height - 40
-        c.setFont("Helvetica", 10)
-    draw_formatted_line(c, 40, y, line)
-    y -= 15
-
-c.save()
-print(f"✅ Output saved to {pdf_filename}")
+class PdfTextWriter:
+    """File-like object that lays out text on PDF pages as it is written.
+
+    Complete lines are drawn immediately and a new page starts whenever the
+    current one is full, so the report never waits for the whole output.
+    With `keep_text`, the written text is also kept for the LLM prompt.
+    """
+
+    def __init__(self, pdf_filename, title, keep_text=False):
+        self.c = canvas.Canvas(pdf_filename, pagesize=letter)
+        self.width, self.height = letter
+        self.c.setFont("Helvetica-Bold", 16)
+        self.c.drawCentredString(self.width / 2, self.height - 40, title)
+        # Start writing output text below title
+        self.y = self.height - 70
+        self.partial = ""
+        self.kept = [] if keep_text else None
+
+    def write(self, text):
+        if self.kept is not None:
+            self.kept.append(text)
+        lines = (self.partial + text).split("\n")
+        self.partial = lines.pop()
+        for line in lines:
+            self._draw(line)
+        return len(text)
+
+    def _draw(self, line):
+        if self.y < 40:
+            self.c.showPage()
+            self.y = self.height - 40
+        draw_formatted_line(self.c, 40, self.y, line)
+        self.y -= 15
+
+    def flush(self):
+        pass
+
+    def text(self):
+        return "".join(self.kept or [])
+
+    def close(self):
+        if self.partial:
+            self._draw(self.partial)
+            self.partial = ""
+        self.c.save()
+
+
+class RateLimiter:
+    """Spaces out request starts so that all scan tasks together stay under `rate` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_slot = 0.0
+        self.requests = 0
+
+    async def wait(self):
+        now = time.monotonic()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        self.requests += 1
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def is_retryable(error):
+    """Whether a failed scan request was throttled or hit a transient fault, so a retry may succeed."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    if isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, TooManyRequests)):
+        return True
+    if isinstance(error, Web3RPCError):
+        rpc_error = (error.rpc_response or {}).get("error")
+        if not isinstance(rpc_error, dict):
+            rpc_error = {"message": str(error)}
+        message = str(rpc_error.get("message", "")).lower()
+        return rpc_error.get("code") in RETRYABLE_RPC_CODES or any(hint in message for hint in RETRYABLE_ERROR_HINTS)
+    return False
+
+
+async def with_retries(limiter, request):
+    """Awaits `request()` within the rate limit, retrying transient failures with exponential backoff."""
+    for attempt in range(SCAN_RETRIES):
+        await limiter.wait()
+        try:
+            return await request()
+        except Exception as e:
+            # An oversized log query fails the same way again, the caller splits it instead
+            if attempt == SCAN_RETRIES - 1 or not is_retryable(e) or is_log_range_error(e):
+                raise
+            await asyncio.sleep(SCAN_BACKOFF * 2 ** attempt * (1 + random.random()))
+
+
+class AsyncCallBatch(CallBatch):
+    """CallBatch for AsyncWeb3 whose requests go through `limiter` and `with_retries`.
+
+    `execute` is a coroutine and `call` only reads results that were already
+    fetched, so queue every call a check needs and await `execute` first.
+    """
+
+    def __init__(self, web3, block_number, limiter, multicall_address=MULTICALL3_ADDRESS):
+        super().__init__(web3, block_number, multicall_address)
+        self.limiter = limiter
+
+    def call(self, contract_function):
+        return self._result(self._key(contract_function))
+
+    async def execute(self):
+        for chunk in self._take_pending():
+            replies = await self._aggregate(chunk) if self.multicall is not None else None
+            if replies is None:
+                replies = await self._json_rpc_batch(chunk)
+            self._store(chunk, replies)
+
+    async def _aggregate(self, calls):
+        aggregate = self._aggregate_function(calls)
+        try:
+            return await with_retries(self.limiter, lambda: aggregate.call(block_identifier=self.block_number))
+        except BadFunctionCallOutput:
+            # Nothing deployed at the Multicall3 address on this chain
+            self.multicall = None
+            return None
+
+    async def _json_rpc_batch(self, calls):
+        batch = self._batch_payload(calls)
+        try:
+            responses = await with_retries(self.limiter, lambda: self.web3.provider.make_batch_request(batch))
+        except (AttributeError, NotImplementedError):
+            responses = None
+        if not isinstance(responses, list):
+            return [await self._single_call(address, data) for (address, data), _ in calls]
+        return self._batch_replies(responses)
+
+    async def _single_call(self, address, data):
+        try:
+            return True, await with_retries(
+                self.limiter, lambda: self.web3.eth.call({"to": address, "data": data}, self.block_number))
+        except REVERT_ERRORS:
+            return False, b""
+
+
+async def fetch_log_range_async(web3, pair_address, from_block, to_block, limiter):
+    try:
+        return await with_retries(limiter, lambda: web3.eth.get_logs(
+            swap_log_filter(pair_address, from_block, to_block)))
+    except Exception as e:
+        if from_block == to_block or not is_log_range_error(e):
+            raise
+    middle = (from_block + to_block) // 2
+    # One half after the other, so a range that keeps failing stops the split at its first leaf
+    left = await fetch_log_range_async(web3, pair_address, from_block, middle, limiter)
+    return left + await fetch_log_range_async(web3, pair_address, middle + 1, to_block, limiter)
+
+
+async def fetch_swap_logs_async(web3, pair_address, from_block, to_block, limiter):
+    """Async `fetch_swap_logs`: all pages are requested concurrently, within the scan's rate limit."""
+    pages = await asyncio.gather(*(fetch_log_range_async(web3, pair_address, start, end, limiter)
+                                   for start, end in log_pages(from_block, to_block)))
+    return [log for page in pages for log in page]
+
+
+async def find_contract_creation_async(web3, address, head, limiter, contract_cache):
+    """Async `find_contract_creation`, with every eth_getCode going through `with_retries`."""
+    cached = contract_cache.creation(address)
+    if cached:
+        return cached
+    if not await with_retries(limiter, lambda: web3.eth.get_code(address, head)):
+        raise ValueError(f"No contract code at {address}")
+    low, high = 0, head
+    while low < high:
+        middle = (low + high) // 2
+        if await with_retries(limiter, lambda: web3.eth.get_code(address, middle)):
+            high = middle
+        else:
+            low = middle + 1
+    block = await with_retries(limiter, lambda: web3.eth.get_block(low))
+    return contract_cache.store_creation(address, low, block["timestamp"])
+
+
+async def pairs_for_tokens(web3, tokens, limiter, block_number):
+    """Returns the USDC or WETH pair of each token, or None where there is neither."""
+    factory = get_factory_contract(web3)
+    calls = AsyncCallBatch(web3, block_number, limiter)
+    lookups = []
+    for token in tokens:
+        token = web3.to_checksum_address(token)
+        lookup = (factory.functions.getPair(token, web3.to_checksum_address(USDC_contract)),
+                  factory.functions.getPair(token, web3.to_checksum_address(WETH_contract)))
+        calls.add(*lookup)
+        lookups.append(lookup)
+    await calls.execute()
+
+    pairs = []
+    for usdc_pair, weth_pair in lookups:
+        pair_address = calls.call(usdc_pair)
+        if pair_address == '0x0000000000000000000000000000000000000000':
+            pair_address = calls.call(weth_pair)
+        pairs.append(None if pair_address == '0x0000000000000000000000000000000000000000' else pair_address)
+    return pairs
+
+
+async def pairs_in_range(web3, indexes, limiter, block_number):
+    """Returns the factory's allPairs entries for `indexes`, clipped to allPairsLength."""
+    factory = get_factory_contract(web3)
+    calls = AsyncCallBatch(web3, block_number, limiter)
+    calls.add(factory.functions.allPairsLength())
+    await calls.execute()
+    indexes = indexes[:max(0, calls.call(factory.functions.allPairsLength()) - indexes.start)]
+    calls.add(*(factory.functions.allPairs(i) for i in indexes))
+    await calls.execute()
+    return [calls.call(factory.functions.allPairs(i)) for i in indexes]
+
+
+async def scan_pair(web3, pair_address, limiter, block_number, swap_index, contract_cache):
+    """Runs the single-token checks on one pair and returns its report section as text."""
+    calls = AsyncCallBatch(web3, block_number, limiter)
+    pair_contract = web3.eth.contract(address=web3.to_checksum_address(pair_address), abi=pair_abi)
+    calls.add(pair_contract.functions.totalSupply(), pair_contract.functions.token0(),
+              pair_contract.functions.token1(), pair_contract.functions.getReserves())
+    await calls.execute()
+
+    token_0 = calls.call(pair_contract.functions.token0())
+    token_1 = calls.call(pair_contract.functions.token1())
+    if token_0 != USDC_contract and token_0 != WETH_contract:
+        input_token = token_0
+    else:
+        input_token = token_1
+    token_contract = web3.eth.contract(address=input_token, abi=token_abi)
+    calls.add(token_contract.functions.name(), token_contract.functions.symbol(),
+              token_contract.functions.totalSupply(), token_contract.functions.owner())
+    await calls.execute()
+    bytecode = None
+    if contract_cache.findings_for_address(input_token) is None:
+        bytecode = await with_retries(limiter, lambda: web3.eth.get_code(input_token, block_number))
+    try:
+        _, creation_timestamp = await find_contract_creation_async(web3, input_token, block_number, limiter,
+                                                                   contract_cache)
+        token_age = format_token_age(input_token, creation_timestamp)
+    except Exception as e:
+        token_age = f"Error fetching token age: {e}"
+    from_block, to_block = swap_index.fetch_range(pair_contract.address, block_number)
+    logs = await fetch_swap_logs_async(web3, pair_contract.address, from_block, to_block, limiter)
+    swap_index.store(pair_contract.address, from_block, to_block, logs)
+
+    # Nothing below awaits, so no other pair can print into this section
+    section = io.StringIO()
+    with contextlib.redirect_stdout(section):
+        print(f"Liquidity Pair Address: {pair_contract.address}")
+        print(f"Total Supply of LP Tokens: {calls.call(pair_contract.functions.totalSupply())}")
+        token_name = calls.call(token_contract.functions.name())
+        token_symbol = calls.call(token_contract.functions.symbol())
+        print(f"Token: {token_name} ({token_symbol}) for pair {pair_contract.address}")
+        liquidity_status = get_liquidity_status(calls, pair_contract=pair_contract, token_contract=token_contract)
+        print(f"Liquidity status for token 0 {token_contract.address}: {liquidity_status}")
+        reserves = calls.call(pair_contract.functions.getReserves())
+        calculate_market_cap(calls, token_contract=token_contract, token_symbol=token_symbol,
+                             reserve0=reserves[0], reserve1=reserves[1])
+        check_minting_ability(token_contract, token_name,
+                              analyze_contract(web3, input_token, contract_cache, bytecode=bytecode))
+        check_ownership_status(calls, token_contract)
+        print(token_age)
+        check_self_destruct(web3, input_token, contract_cache, bytecode=bytecode)
+        print_volumes(pair_contract.address, swap_index.volumes(pair_contract.address, block_number))
+    return section.getvalue()
+
+
+async def run_scan(targets, pdf_filename, async_web3=None):
+    """Analyses many pairs concurrently and writes one combined report.
+
+    `targets` is a list of token addresses, each looked up like the single-token
+    mode does, or a range of factory allPairs indexes.
+    """
+    own_provider = async_web3 is None
+    if own_provider:
+        async_web3 = AsyncWeb3(AsyncHTTPProvider(BASE_RPC_URL))
+    limiter = RateLimiter(SCAN_REQUESTS_PER_SECOND)
+    swap_index = SwapIndex()
+    contract_cache = ContractCache()
+    semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+    started = time.perf_counter()
+
+    async def scan_one(pair_address):
+        async with semaphore:
+            try:
+                return await scan_pair(async_web3, pair_address, limiter, block_number, swap_index,
+                                       contract_cache)
+            except Exception as e:
+                return f"Error scanning pair {pair_address}: {e}\n"
+
+    try:
+        # One block for the whole scan, so all pairs are compared at the same state
+        block_number = await with_retries(limiter, lambda: async_web3.eth.block_number)
+        if isinstance(targets, range):
+            pairs = await pairs_in_range(async_web3, targets, limiter, block_number)
+        else:
+            pairs = await pairs_for_tokens(async_web3, targets, limiter, block_number)
+        sections = await asyncio.gather(*(scan_one(pair_address) for pair_address in pairs if pair_address))
+    finally:
+        swap_index.close()
+        contract_cache.close()
+        if own_provider:
+            await async_web3.provider.disconnect()
+
+    report = PdfTextWriter(pdf_filename, "Uniswap V2 Pairs Scan")
+    sections = iter(sections)
+    for target, pair_address in zip(targets, pairs):
+        if pair_address is None:
+            report.write(f"Pair could not be found for {target} backed by WETH or USDC.\n\n")
+        else:
+            report.write(next(sections) + "\n")
+    missing = sum(1 for pair_address in pairs if pair_address is None)
+    summary = (f"Scanned {len(pairs) - missing} pairs at block {block_number} in "
+               f"{time.perf_counter() - started:.1f} s with {limiter.requests} RPC requests")
+    report.write(summary + "\n")
+    report.close()
+    print(summary)
+
+
+def read_scan_tokens(args):
+    """Token addresses from the command line; an argument naming a file adds one address per line."""
+    tokens = []
+    for arg in args:
+        if os.path.isfile(arg):
+            with open(arg) as token_file:
+                tokens.extend(line.strip() for line in token_file if line.strip())
+        else:
+            tokens.extend(token for token in arg.split(",") if token)
+    return tokens
+
+
+if __name__ == "__main__":
+    # scan <token or file> ... / scan-pairs <start> <stop>: many pairs, one combined report
+    if len(sys.argv) > 2 and sys.argv[1] == "scan":
+        asyncio.run(run_scan(read_scan_tokens(sys.argv[2:]), '/data/outputs/report.pdf'))
+        sys.exit(0)
+    if len(sys.argv) > 3 and sys.argv[1] == "scan-pairs":
+        asyncio.run(run_scan(range(int(sys.argv[2]), int(sys.argv[3])), '/data/outputs/report.pdf'))
+        sys.exit(0)
+
+    web3 = Web3(Web3.HTTPProvider(BASE_RPC_URL))
+
+    # Ensure the connection to the Base chain
+    if web3.is_connected():
+        print("Connected to Base Chain")
+
+    # input token address from get_factory_contract(web3).functions.allPairs(250).call()
+    input_token_address = "0xe24A17BFF5E3986C603Bf6E90c892cbe6b07ad51"
+
+    # All contract reads below share one block and go out in three batched requests
+    calls = CallBatch(web3)
+    pair_address = find_pair_by_token(calls, token_address=input_token_address)
+    if pair_address is None:
+        print("Pair could not be found! Quit execution of the algorithm...")
+        quit()
+
+    pdf_filename = '/data/outputs/report.pdf'
+    report = PdfTextWriter(pdf_filename, "Uniswap V2 Pair Characteristics", keep_text=True)
+    sys.stdout = report
+    print(f"Liquidity Pair Address: {pair_address}")
+    pair_contract = web3.eth.contract(address=web3.to_checksum_address(pair_address), abi=pair_abi)
+    calls.add(pair_contract.functions.totalSupply(), pair_contract.functions.token0(),
+              pair_contract.functions.token1(), pair_contract.functions.getReserves())
+
+    # Get total supply of LP tokens
+    total_lp_tokens = calls.call(pair_contract.functions.totalSupply())
+    print(f"Total Supply of LP Tokens: {total_lp_tokens}")
+
+    # Get token addresses
+    token_0 = calls.call(pair_contract.functions.token0())
+    token_1 = calls.call(pair_contract.functions.token1())
+    if token_0 != USDC_contract and token_0 != WETH_contract:
+        input_token = token_0
+    else:
+        input_token = token_1
+    token_contract = web3.eth.contract(address=input_token, abi=token_abi)
+    calls.add(token_contract.functions.name(), token_contract.functions.symbol(),
+              token_contract.functions.totalSupply(), token_contract.functions.owner())
+
+    # Get token names and symbols
+    token_name = calls.call(token_contract.functions.name())
+    token_symbol = calls.call(token_contract.functions.symbol())
+    print(f"Token: {token_name} ({token_symbol}) for pair {pair_address}")
+
+    # Fetch liquidity reserves
+    liquidity_status_0 = get_liquidity_status(calls, pair_contract=pair_contract, token_contract=token_contract)
+    print(f"Liquidity status for token 0 {token_contract.address}: {liquidity_status_0}")
+
+    # Calculate market cap
+    reserves = calls.call(pair_contract.functions.getReserves())
+    market_cap_0 = calculate_market_cap(calls, token_contract=token_contract, token_symbol=token_symbol,
+                                        reserve0=reserves[0],
+                                        reserve1=reserves[1])
+
+    # Check if each token from the pair is mintable
+    contract_cache = ContractCache()
+    mintable0, ts_status0 = check_minting_ability(token_contract, token_name,
+                                                  analyze_contract(web3, token_contract.address, contract_cache))
+
+    # Check if each token has owner renounced or not
+    ownership0 = check_ownership_status(calls, token_contract)
+
+    # Calculate token age
+    print(get_token_age(web3=web3, token_address=token_contract.address, contract_cache=contract_cache,
+                        latest_block=calls.block_number))
+
+    # Check if selfdestruct function exists
+    selfdestruct0 = check_self_destruct(web3=web3, contract_address=token_contract.address,
+                                        contract_cache=contract_cache)
+    contract_cache.close()
+
+    # Compute 24h, 7d and 30d Volume of the pair from the local Swap index
+    swap_index = SwapIndex()
+    volumes = get_volumes(web3, swap_index, pair_contract=pair_contract, latest_block=calls.block_number)
+    swap_index.close()
+
+    sys.stdout = sys.__stdout__
+
+    # The printed analysis is already on the PDF; it is also the LLM prompt
+    output_text = report.text()
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": "bearer " + API_KEY_ASI1,
+    }
+    payload = json.dumps({
+                "model": "asi1-mini",
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": f"Please provide positive aspects, potential risks and recommendations regarding this token with the following characteristics: {output_text}"
+                    }
+                ],
+                "temperature": 0,
+                "stream": False
+            })
+    response = requests.post('https://api.asi1.ai/v1/chat/completions', headers=headers, data=payload).json()
+    output_llm = response['thought'][0]
+    report.write(output_llm)
+    report.close()
+    print(f"✅ Output saved to {pdf_filename}")
@@ -0,0 +1,15 @@
+# pragma version ^0.4.0
+# Uniswap V2 factory stand-in: getPair, allPairs and allPairsLength
+getPair: public(HashMap[address, HashMap[address, address]])
+allPairs: public(DynArray[address, 1000])
+
+@external
+def register(a: address, b: address, pair: address):
+    self.getPair[a][b] = pair
+    self.getPair[b][a] = pair
+    self.allPairs.append(pair)
+
+@external
+@view
+def allPairsLength() -> uint256:
+    return len(self.allPairs)
@@ -0,0 +1,19 @@
+# pragma version ^0.4.0
+# Token with an open mint() and a selfdestruct path
+name: public(String[32])
+symbol: public(String[32])
+totalSupply: public(uint256)
+
+@deploy
+def __init__(n: String[32], s: String[32], supply: uint256):
+    self.name = n
+    self.symbol = s
+    self.totalSupply = supply
+
+@external
+def mint():
+    self.totalSupply += 1
+
+@external
+def destroy():
+    selfdestruct(msg.sender)
@@ -0,0 +1,27 @@
+# pragma version ^0.4.0
+# Multicall3 aggregate3 stand-in
+struct Call3:
+    target: address
+    allowFailure: bool
+    callData: Bytes[1024]
+
+struct Result:
+    success: bool
+    returnData: Bytes[1024]
+
+@external
+@payable
+def aggregate3(calls: DynArray[Call3, 128]) -> DynArray[Result, 128]:
+    results: DynArray[Result, 128] = []
+    for c: Call3 in calls:
+        success: bool = False
+        data: Bytes[1024] = b""
+        success, data = raw_call(c.target, c.callData, max_outsize=1024, revert_on_failure=False)
+        assert success or c.allowFailure
+        results.append(Result(success=success, returnData=data))
+    return results
+
+@external
+@view
+def getBlockNumber() -> uint256:
+    return block.number
@@ -0,0 +1,37 @@
+# pragma version ^0.4.0
+# Uniswap V2 pair stand-in that emits seeded Swap events
+event Swap:
+    sender: indexed(address)
+    amount0In: uint256
+    amount1In: uint256
+    amount0Out: uint256
+    amount1Out: uint256
+    to: indexed(address)
+
+token0: public(address)
+token1: public(address)
+totalSupply: public(uint256)
+r0: uint256
+r1: uint256
+
+@deploy
+def __init__(t0: address, t1: address, supply: uint256, r0: uint256, r1: uint256):
+    self.token0 = t0
+    self.token1 = t1
+    self.totalSupply = supply
+    self.r0 = r0
+    self.r1 = r1
+
+@external
+@view
+def getReserves() -> (uint256, uint256, uint256):
+    return self.r0, self.r1, block.timestamp
+
+@external
+def swap(a0: uint256, a1: uint256, b0: uint256, b1: uint256, to: address):
+    log Swap(sender=msg.sender, amount0In=a0, amount1In=a1, amount0Out=b0, amount1Out=b1, to=to)
+
+@external
+def swapMany(n: uint256, a0: uint256):
+    for i: uint256 in range(n, bound=500):
+        log Swap(sender=msg.sender, amount0In=a0 + i, amount1In=i, amount0Out=0, amount1Out=0, to=msg.sender)
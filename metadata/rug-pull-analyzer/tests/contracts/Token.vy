@@ -0,0 +1,13 @@
+# pragma version ^0.4.0
+# Fixed-supply token with name, symbol, totalSupply and owner
+name: public(String[32])
+symbol: public(String[32])
+totalSupply: public(uint256)
+owner: public(address)
+
+@deploy
+def __init__(n: String[32], s: String[32], supply: uint256, o: address):
+    self.name = n
+    self.symbol = s
+    self.totalSupply = supply
+    self.owner = o
@@ -0,0 +1,102 @@
+"""JSON-RPC HTTP front for an eth-tester chain that behaves like a public Base endpoint.
+
+It answers single and batched requests. eth_getLogs queries that match more than
+`max_logs` logs fail with the "query returned more than N results" error of
+Geth-style nodes. Requests can be throttled with a -32005 "rate limited" error
+to check that throttling is retried rather than treated as a range cap.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from eth_tester.exceptions import TransactionFailed
+
+
+# Position of the block number parameter that eth-tester wants as an int
+BLOCK_PARAMS = {"eth_getBlockByNumber": 0, "eth_getCode": 1, "eth_call": 1}
+
+
+def _block(value):
+    return int(value, 16) if isinstance(value, str) and value.startswith("0x") else value
+
+
+class FakeNode(ThreadingHTTPServer):
+    def __init__(self, web3, max_logs=None):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.web3 = web3
+        self.max_logs = max_logs
+        # Number of upcoming requests, per method, answered with a throttling error
+        self.throttled = {}
+        # Every JSON-RPC request received, batches flattened, and the HTTP posts
+        self.requests = []
+        self.posts = 0
+        self.lock = threading.Lock()
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+    def count(self, method):
+        return sum(1 for request in self.requests if request["method"] == method)
+
+    def _error(self, request, code, message):
+        return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": code, "message": message}}
+
+    def handle_request_object(self, request):
+        method, params = request["method"], list(request.get("params", []))
+        with self.lock:
+            self.requests.append(request)
+            if self.throttled.get(method):
+                self.throttled[method] -= 1
+                return self._error(request, -32005, "Too many requests, request rate limited")
+
+            if method == "eth_getLogs":
+                query = dict(params[0])
+                for key in ("fromBlock", "toBlock"):
+                    query[key] = _block(query.get(key))
+                logs = self.web3.eth.get_logs(query)
+                if self.max_logs is not None and len(logs) > self.max_logs:
+                    return self._error(request, -32005, f"query returned more than {self.max_logs} results")
+                return {"jsonrpc": "2.0", "id": request["id"], "result": json.loads(self.web3.to_json(logs))}
+
+            if method in BLOCK_PARAMS:
+                position = BLOCK_PARAMS[method]
+                params[position] = _block(params[position])
+            if method == "eth_call":
+                params[0] = dict(params[0], **{"from": self.web3.eth.accounts[0]})
+            try:
+                response = self.web3.provider.make_request(method, params)
+            except TransactionFailed:
+                return self._error(request, 3, "execution reverted")
+            except Exception as e:
+                return self._error(request, -32000, str(e))
+
+        if "error" in response:
+            return {"jsonrpc": "2.0", "id": request["id"], "error": response["error"]}
+        result = response["result"]
+        if isinstance(result, int):
+            result = hex(result)
+        elif not isinstance(result, (str, type(None))):
+            result = json.loads(self.web3.to_json(result))
+        return {"jsonrpc": "2.0", "id": request["id"], "result": result}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.posts += 1
+        if isinstance(body, list):
+            reply = [self.server.handle_request_object(request) for request in body]
+        else:
+            reply = self.server.handle_request_object(body)
+        data = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
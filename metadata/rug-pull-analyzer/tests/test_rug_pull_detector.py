@@ -0,0 +1,205 @@
+"""Checks of rug-pull-detector.py against a seeded eth-tester chain.
+
+The contracts in `contracts/` stand in for the Uniswap V2 factory and pairs,
+Multicall3 and the tokens. `fake_node.FakeNode` serves the chain over HTTP with
+the result caps and throttling errors of a public endpoint.
+
+Run with `python -m pytest tests` after `pip install "eth-tester[py-evm]" vyper pytest`.
+"""
+import asyncio
+import importlib.util
+import os
+import random
+
+import pytest
+
+pytest.importorskip("eth_tester")
+vyper = pytest.importorskip("vyper")
+
+from web3 import AsyncHTTPProvider, AsyncWeb3, EthereumTesterProvider, Web3  # noqa: E402
+
+from fake_node import FakeNode  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ZERO_ADDRESS = "0x" + "00" * 20
+
+
+def load_detector():
+    path = os.path.join(os.path.dirname(HERE), "rug-pull-detector.py")
+    spec = importlib.util.spec_from_file_location("rug_pull_detector", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def deploy(web3, name, *args):
+    with open(os.path.join(HERE, "contracts", f"{name}.vy")) as source:
+        compiled = vyper.compile_code(source.read(), output_formats=["abi", "bytecode"])
+    factory = web3.eth.contract(abi=compiled["abi"], bytecode=compiled["bytecode"])
+    receipt = web3.eth.wait_for_transaction_receipt(factory.constructor(*args).transact())
+    return web3.eth.contract(address=receipt.contractAddress, abi=compiled["abi"])
+
+
+@pytest.fixture
+def detector():
+    return load_detector()
+
+
+@pytest.fixture
+def chain(detector):
+    web3 = Web3(EthereumTesterProvider())
+    web3.eth.default_account = web3.eth.accounts[0]
+    multicall = deploy(web3, "Multicall3")
+    usdc = deploy(web3, "Token", "USD Coin", "USDC", 10**12, web3.eth.accounts[0])
+    token = deploy(web3, "Token", "Good", "GOOD", 10**24, ZERO_ADDRESS)
+    pair = deploy(web3, "Pair", token.address, usdc.address, 5000, 10**23, 10**9)
+    factory = deploy(web3, "Factory")
+    factory.functions.register(token.address, usdc.address, pair.address).transact()
+
+    detector.uniswap_v2_factory_address = factory.address
+    detector.USDC_contract = usdc.address
+    detector.WETH_contract = Web3.to_checksum_address("0x" + "11" * 20)
+    return dict(web3=web3, multicall=multicall, usdc=usdc, token=token, pair=pair)
+
+
+@pytest.fixture
+def seeded_swaps(chain):
+    """Seeded Swap events over a few dozen blocks, the last one with amounts close to 2**256."""
+    web3, pair = chain["web3"], chain["pair"]
+    rng = random.Random(1)
+    for _ in range(12):
+        pair.functions.swapMany(rng.randint(1, 60), rng.randint(0, 2**200)).transact()
+        web3.provider.ethereum_tester.mine_blocks(rng.randint(0, 3))
+    pair.functions.swap(2**256 - 1, 2**255, 0, 0, chain["usdc"].address).transact()
+    return web3.eth.get_logs({"fromBlock": 0, "toBlock": "latest", "address": pair.address})
+
+
+@pytest.fixture
+def node(chain):
+    fake_node = FakeNode(chain["web3"], max_logs=70)
+    yield fake_node
+    fake_node.close()
+
+
+def read_checks(detector, calls, chain):
+    pair_address = detector.find_pair_by_token(calls, chain["token"].address)
+    pair_contract = calls.web3.eth.contract(address=pair_address, abi=detector.pair_abi)
+    token_contract = calls.web3.eth.contract(address=chain["token"].address, abi=detector.token_abi)
+    calls.add(pair_contract.functions.getReserves(), pair_contract.functions.token0(),
+              token_contract.functions.name(), token_contract.functions.totalSupply(),
+              token_contract.functions.owner())
+    reserves = calls.call(pair_contract.functions.getReserves())
+    return (pair_address, calls.call(token_contract.functions.name()), reserves[:2],
+            detector.get_liquidity_status(calls, pair_contract, token_contract),
+            detector.check_ownership_status(calls, token_contract))
+
+
+def test_call_batch_multicall_and_fallbacks_agree(detector, chain, node):
+    web3 = chain["web3"]
+    expected = (chain["pair"].address, "Good", [10**23, 10**9], "PARTIALLY LOCKED", "RENOUNCED")
+
+    multicall = detector.CallBatch(web3, multicall_address=chain["multicall"].address)
+    assert read_checks(detector, multicall, chain) == expected
+    # The factory lookups, then the pair and token reads, one aggregate3 each
+    assert multicall.round_trips == 2
+
+    # eth-tester has no batch requests, so each call is sent alone
+    single = detector.CallBatch(web3, multicall_address=None)
+    assert read_checks(detector, single, chain) == expected
+
+    undeployed = detector.CallBatch(web3, multicall_address="0x" + "22" * 20)
+    assert read_checks(detector, undeployed, chain) == expected
+    assert undeployed.multicall is None
+
+    batch = detector.CallBatch(Web3(Web3.HTTPProvider(node.url)), multicall_address=None)
+    node.posts = 0
+    assert read_checks(detector, batch, chain) == expected
+    assert node.posts == batch.round_trips == 2
+
+
+def test_call_batch_reports_reverts_per_call(detector, chain):
+    calls = detector.CallBatch(chain["web3"], multicall_address=chain["multicall"].address)
+    # The pair has no name(), its call reverts while the others in the aggregate succeed
+    pair_as_token = chain["web3"].eth.contract(address=chain["pair"].address, abi=detector.token_abi)
+    calls.add(pair_as_token.functions.name(), pair_as_token.functions.totalSupply())
+    with pytest.raises(detector.ContractLogicError):
+        calls.call(pair_as_token.functions.name())
+    assert calls.call(pair_as_token.functions.totalSupply()) == 5000
+    assert calls.round_trips == 1
+
+
+def test_fetch_swap_logs_splits_capped_pages(detector, chain, seeded_swaps, node, monkeypatch):
+    monkeypatch.setattr(detector, "LOG_PAGE_BLOCKS", 7)
+    head = chain["web3"].eth.block_number
+    logs = detector.fetch_swap_logs(Web3(Web3.HTTPProvider(node.url)), chain["pair"].address, 0, head)
+
+    assert [(log["blockNumber"], log["logIndex"]) for log in logs] == \
+        [(log["blockNumber"], log["logIndex"]) for log in seeded_swaps]
+    # Pages with more than max_logs swaps were refused and fetched in halves
+    assert node.count("eth_getLogs") > len(detector.log_pages(0, head))
+
+
+def test_uint256_sums_are_exact(detector, chain, seeded_swaps):
+    swaps = [chain["pair"].events.Swap().process_log(log)["args"] for log in seeded_swaps]
+    data = b"".join(bytes(log["data"]) for log in seeded_swaps)
+    sums = detector.uint256_sums(detector.uint256_limbs(data, 4))
+
+    assert sums == [sum(swap[field] for swap in swaps)
+                    for field in ("amount0In", "amount1In", "amount0Out", "amount1Out")]
+    assert sums[0] > 2**256
+
+
+def fetch_async(detector, node, chain, from_block, to_block):
+    async def fetch():
+        web3 = AsyncWeb3(AsyncHTTPProvider(node.url))
+        try:
+            return await detector.fetch_swap_logs_async(web3, chain["pair"].address, from_block, to_block,
+                                                        detector.RateLimiter(1000))
+        finally:
+            await web3.provider.disconnect()
+
+    return asyncio.run(fetch())
+
+
+def test_throttled_log_requests_are_retried_not_split(detector, chain, seeded_swaps, node, monkeypatch):
+    monkeypatch.setattr(detector, "SCAN_BACKOFF", 0)
+    head = chain["web3"].eth.block_number
+    node.max_logs = None
+    node.throttled["eth_getLogs"] = 3
+
+    logs = fetch_async(detector, node, chain, 0, head)
+    assert len(logs) == len(seeded_swaps)
+    assert node.count("eth_getLogs") == 4
+    ranges = {(request["params"][0]["fromBlock"], request["params"][0]["toBlock"]) for request in node.requests}
+    assert ranges == {(hex(0), hex(head))}
+
+
+def test_range_capped_log_requests_are_split_not_retried(detector, chain, seeded_swaps, node, monkeypatch):
+    monkeypatch.setattr(detector, "SCAN_BACKOFF", 0)
+    head = chain["web3"].eth.block_number
+
+    logs = fetch_async(detector, node, chain, 0, head)
+    assert [(log["blockNumber"], log["logIndex"]) for log in logs] == \
+        [(log["blockNumber"], log["logIndex"]) for log in seeded_swaps]
+    ranges = [(request["params"][0]["fromBlock"], request["params"][0]["toBlock"]) for request in node.requests]
+    # Every refused range is asked once, then only its halves
+    assert len(ranges) == len(set(ranges))
+
+
+def test_throttling_past_the_retries_is_raised(detector, chain, node, monkeypatch):
+    monkeypatch.setattr(detector, "SCAN_BACKOFF", 0)
+    node.throttled["eth_getLogs"] = detector.SCAN_RETRIES
+    with pytest.raises(detector.Web3RPCError, match="rate limited"):
+        fetch_async(detector, node, chain, 0, 10)
+    assert node.count("eth_getLogs") == detector.SCAN_RETRIES
+
+
+def test_mint_detection_reads_the_bytecode(detector, chain, tmp_path):
+    web3 = chain["web3"]
+    mintable = deploy(web3, "MintableToken", "Rug", "RUG", 10**24)
+    contract_cache = detector.ContractCache(str(tmp_path / "contracts.sqlite"))
+    for address, expected in ((mintable.address, "MINTABLE"), (chain["token"].address, "NOT MINTABLE"),
+                              ("0x" + "33" * 20, "NOT MINTABLE")):
+        findings = detector.analyze_contract(web3, address, contract_cache)
+        token_contract = web3.eth.contract(address=Web3.to_checksum_address(address), abi=detector.token_abi)
+        assert detector.check_minting_ability(token_contract, "token", findings)[0] == expected
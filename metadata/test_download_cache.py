@@ -0,0 +1,199 @@
+"""Tests for download_cache against a local HTTP server.
+
+Run with `python -m pytest metadata/test_download_cache.py`.
+"""
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import download_cache
+
+
+class Origin(BaseHTTPRequestHandler):
+    """Serves `server.body` with ETag, Last-Modified, Range and If-Range support."""
+
+    def do_GET(self):
+        origin = self.server
+        origin.requests.append(dict(self.headers))
+        body, etag = origin.body, origin.etag
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        start = 0
+        byte_range = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if byte_range and if_range in (None, etag, origin.last_modified):
+            start = int(byte_range.split("=")[1].split("-")[0])
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        else:
+            self.send_response(200)
+        if etag:
+            self.send_header("ETag", etag)
+        if origin.last_modified:
+            self.send_header("Last-Modified", origin.last_modified)
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+        if origin.drop_after is not None:
+            # Simulates a dropped connection in the middle of the body, once
+            self.wfile.write(body[start:start + origin.drop_after])
+            origin.drop_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(body[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def origin():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Origin)
+    server.body = os.urandom(300_000)
+    server.etag = '"v1"'
+    server.last_modified = "Wed, 01 Jan 2025 00:00:00 GMT"
+    server.drop_after = None
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/data.bin"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    for key in download_cache.stats:
+        download_cache.stats[key] = 0
+
+
+def read(path):
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def part_paths(cache_dir, url):
+    part_path = os.path.join(cache_dir, "partial", download_cache._url_key(url) + ".part")
+    os.makedirs(os.path.dirname(part_path), exist_ok=True)
+    return part_path, part_path + ".json"
+
+
+def test_fetch_caches_by_url(origin, tmp_path):
+    path = download_cache.fetch(origin.url, cache_dir=str(tmp_path))
+    assert read(path) == origin.body
+    assert download_cache.fetch(origin.url, cache_dir=str(tmp_path)) == path
+    assert len(origin.requests) == 1
+    assert download_cache.stats == {"hits": 1, "not_modified": 0, "misses": 1}
+
+
+def test_fetch_copies_to_dest(origin, tmp_path):
+    dest = tmp_path / "out.bin"
+    assert download_cache.fetch(origin.url, dest=str(dest), cache_dir=str(tmp_path / "cache")) == str(dest)
+    assert read(dest) == origin.body
+
+
+def test_interrupted_download_resumes(origin, tmp_path, monkeypatch):
+    # Only whole chunks reach the partial file before the connection drops
+    monkeypatch.setattr(download_cache, "CHUNK_SIZE", 65536)
+    origin.drop_after = 100_000
+    path = download_cache.fetch(origin.url, cache_dir=str(tmp_path))
+    assert read(path) == origin.body
+    assert len(origin.requests) == 2
+    assert origin.requests[1]["Range"] == "bytes=65536-"
+    assert origin.requests[1]["If-Range"] == origin.etag
+
+
+def test_resume_discards_partial_of_a_changed_body(origin, tmp_path):
+    part_path, meta_path = part_paths(str(tmp_path), origin.url)
+    with open(part_path, "wb") as part_file:
+        part_file.write(os.urandom(100_000))
+    with open(meta_path, "w") as meta_file:
+        json.dump({"etag": '"v0"', "last_modified": None, "length": 300_000}, meta_file)
+
+    path = download_cache.fetch(origin.url, cache_dir=str(tmp_path))
+    assert read(path) == origin.body
+    assert not os.path.exists(part_path + ".json")
+
+
+def test_resume_discards_partial_without_validator(origin, tmp_path):
+    part_path, _ = part_paths(str(tmp_path), origin.url)
+    with open(part_path, "wb") as part_file:
+        part_file.write(os.urandom(100_000))
+
+    path = download_cache.fetch(origin.url, cache_dir=str(tmp_path))
+    assert read(path) == origin.body
+    assert "Range" not in origin.requests[0]
+
+
+def test_416_restarts_unless_partial_is_complete(origin, tmp_path):
+    part_path, meta_path = part_paths(str(tmp_path), origin.url)
+    with open(part_path, "wb") as part_file:
+        part_file.write(os.urandom(400_000))
+    with open(meta_path, "w") as meta_file:
+        json.dump({"etag": origin.etag, "last_modified": None, "length": 400_000}, meta_file)
+
+    path = download_cache.fetch(origin.url, cache_dir=str(tmp_path))
+    assert read(path) == origin.body
+    assert len(origin.requests) == 2
+
+
+def test_checksum_mismatch_is_not_cached(origin, tmp_path):
+    with pytest.raises(download_cache.ChecksumError):
+        download_cache.fetch(origin.url, sha256="0" * 64, cache_dir=str(tmp_path))
+    assert os.listdir(tmp_path / "objects") == []
+
+    digest = hashlib.sha256(origin.body).hexdigest()
+    path = download_cache.fetch(origin.url, sha256=digest, cache_dir=str(tmp_path))
+    assert os.path.basename(path) == digest
+
+
+def test_eviction_drops_least_recently_used(origin, tmp_path):
+    cache_dir = str(tmp_path)
+    first = download_cache.fetch(origin.url + "?1", cache_dir=cache_dir, max_bytes=700_000)
+    origin.body = os.urandom(300_000)
+    second = download_cache.fetch(origin.url + "?2", cache_dir=cache_dir, max_bytes=700_000)
+    os.utime(first, (1, 1))
+    os.utime(second, (2, 2))
+    origin.body = os.urandom(300_000)
+    third = download_cache.fetch(origin.url + "?3", cache_dir=cache_dir, max_bytes=700_000)
+    assert not os.path.exists(first)
+    assert os.path.exists(second) and os.path.exists(third)
+
+
+def test_fetch_conditional_revalidates(origin, tmp_path):
+    cache_dir = str(tmp_path)
+    path = download_cache.fetch_conditional(origin.url, max_age=0, cache_dir=cache_dir)
+    assert read(path) == origin.body
+    assert download_cache.fetch_conditional(origin.url, max_age=0, cache_dir=cache_dir) == path
+    assert origin.requests[1]["If-None-Match"] == origin.etag
+    assert download_cache.stats["not_modified"] == 1
+
+    origin.body, origin.etag = os.urandom(1000), '"v2"'
+    assert read(download_cache.fetch_conditional(origin.url, max_age=0, cache_dir=cache_dir)) == origin.body
+    assert download_cache.stats["misses"] == 2
+
+
+def test_fetch_conditional_max_age_and_offline(origin, tmp_path):
+    cache_dir = str(tmp_path)
+    path = download_cache.fetch_conditional(origin.url, cache_dir=cache_dir)
+    assert download_cache.fetch_conditional(origin.url, max_age=3600, cache_dir=cache_dir) == path
+    assert len(origin.requests) == 1
+
+    origin.shutdown()
+    origin.server_close()
+    assert download_cache.fetch_conditional(origin.url, max_age=0, cache_dir=cache_dir) == path
+    with pytest.raises(requests.ConnectionError):
+        download_cache.fetch_conditional(origin.url + "?uncached", max_age=0, cache_dir=cache_dir)